@@ -0,0 +1,181 @@
+"""Token-aware compaction of signal text before it is sent for scoring.
+
+GitHub issue bodies in particular are dominated by stack traces, code
+blocks, issue-template boilerplate and quoted replies. None of it tells
+Haiku whether the author has a data problem, but all of it is billed.
+``compact`` keeps the human-written prose and replaces the rest with short
+placeholders:
+
+- fenced code blocks -> ``[code: N lines]``
+- runs of traceback / log lines -> ``[log: N lines] <final error line>``
+- quoted replies (``> ...``) -> ``[quoted text]``
+- HTML comments are dropped; headings are kept as short labels
+- in GitHub issues, template checkboxes and ``#``-headed environment/version
+  sections are dropped too. Elsewhere (and for ``**bold**`` lines) a
+  heading like "Environment" is as likely to introduce the author's own
+  story, so nothing is dropped
+
+The result is cut to ``max_tokens`` on a paragraph or sentence boundary.
+
+Run ``python compaction.py`` to see the savings on signals already stored.
+"""
+
+import re
+
+import config
+
+
+# ~4 chars/token, as in scoring.estimate_tokens
+_CHARS_PER_TOKEN = 4
+
+_FENCE_RE = re.compile(r"^(```|~~~)[^\n]*\n.*?(?:^\1[ \t]*$|\Z)", re.MULTILINE | re.DOTALL)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?(?:-->|\Z)", re.DOTALL)
+_CHECKBOX_RE = re.compile(r"^\s*[-*] \[[ xX]\] ")
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+(.+?)|\*\*([^*]+)\*\*):?\s*$")
+
+_LOG_LINE_RE = re.compile(
+    r"""^\s*(?:
+        Traceback\ \(most\ recent\ call\ last\)
+      | File\ "[^"]+",\ line\ \d+
+      | at\ [\w$.<>]+\(.*\)                              # JVM / JS stack frames
+      | \d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}                 # timestamped log lines
+      | \[?(?:DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL)\]?[\s:]
+      | \[rank\d+\]
+      | \^+\s*$
+      | [\w.]+(?:Error|Exception|Warning):\ .*
+      | \d+%\|                                           # tqdm progress bars
+    )""",
+    re.VERBOSE,
+)
+_ERROR_LINE_RE = re.compile(r"^\s*[\w.]*(?:Error|Exception):")
+
+# Template sections that are pure environment detail, dropped with their body
+_DROPPED_SECTIONS = {
+    "system info", "environment", "versions", "version", "who can help",
+    "checklist", "information", "dependencies", "platform", "installation",
+}
+
+
+def _code_placeholder(match: re.Match) -> str:
+    lines = max(match.group(0).count("\n") - 1, 0)
+    return f"[code: {lines} line{'s' if lines != 1 else ''}]\n"
+
+
+def _heading(line: str) -> str | None:
+    m = _HEADING_RE.match(line)
+    if m is None:
+        return None
+    heading = (m.group(1) or m.group(2)).strip().rstrip(":?")
+    return heading if 0 < len(heading) <= 60 else None
+
+
+def _collapse_logs(lines: list[str]) -> list[str]:
+    """Replace runs of traceback/log lines (2+) with a one-line summary."""
+    out = []
+    i = 0
+    while i < len(lines):
+        if not _LOG_LINE_RE.match(lines[i]):
+            out.append(lines[i])
+            i += 1
+            continue
+        j = i
+        # Source excerpts between "File ..." frames are indented code
+        while j < len(lines) and (_LOG_LINE_RE.match(lines[j]) or (j > i and lines[j].startswith("    "))):
+            j += 1
+        run = lines[i:j]
+        if len(run) < 2:
+            out.extend(run)
+        else:
+            errors = [line.strip() for line in run if _ERROR_LINE_RE.match(line)]
+            summary = f"[log: {len(run)} lines]"
+            out.append(f"{summary} {errors[-1][:200]}" if errors else summary)
+        i = j
+    return out
+
+
+def _strip_template(lines: list[str], issue_template: bool) -> list[str]:
+    """Shorten headings to labels; in issue templates, drop checkboxes and environment sections."""
+    out = []
+    dropping = False
+    for line in lines:
+        heading = _heading(line)
+        if heading is not None:
+            if issue_template and line.lstrip().startswith("#"):
+                dropping = heading.lower() in _DROPPED_SECTIONS
+            if not dropping:
+                out.append(f"{heading}:" if heading[-1] not in ".!" else heading)
+            continue
+        if dropping or (issue_template and _CHECKBOX_RE.match(line)):
+            continue
+        out.append(line)
+    return out
+
+
+def _collapse_quotes(lines: list[str]) -> list[str]:
+    out = []
+    for line in lines:
+        if line.lstrip().startswith(">"):
+            if not out or out[-1] != "[quoted text]":
+                out.append("[quoted text]")
+            continue
+        out.append(line)
+    return out
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut to ``max_chars``, backing up to a paragraph or sentence end if one is close."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    for boundary in ("\n\n", ". ", "\n"):
+        end = cut.rfind(boundary)
+        if end >= max_chars * 0.7:
+            return cut[:end + len(boundary)].rstrip() + " [...]"
+    return cut.rstrip() + " [...]"
+
+
+def compact(text: str, max_tokens: int | None = None, source: str = "") -> str:
+    """Strip code, logs, boilerplate and quotes from ``text``, then fit it to ``max_tokens``.
+
+    ``source`` is the signal's source; issue-template sections are only
+    dropped for ``"github"``.
+    """
+    max_tokens = max_tokens or config.SCORING_TEXT_MAX_TOKENS
+    if not text:
+        return ""
+
+    text = _HTML_COMMENT_RE.sub("", text)
+    text = _FENCE_RE.sub(_code_placeholder, text)
+
+    lines = text.splitlines()
+    lines = _collapse_quotes(lines)
+    lines = _strip_template(lines, issue_template=source == "github")
+    lines = _collapse_logs(lines)
+
+    text = "\n".join(line.rstrip() for line in lines)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    return _truncate(text, max_tokens * _CHARS_PER_TOKEN)
+
+
+def _report(limit: int = 2000):
+    """Compare raw text[:2000] against compacted text on stored signals."""
+    import storage
+
+    rows = storage.get_recent_signal_texts(limit)
+    if not rows:
+        print("No stored signals to compare")
+        return
+    by_source = {}
+    for row in rows:
+        raw = (row["text"] or "")[:2000]
+        compacted = compact(row["text"] or "", source=row["source"])
+        before, after = by_source.setdefault(row["source"], [0, 0])
+        by_source[row["source"]] = [before + len(raw), after + len(compacted)]
+    print(f"{len(rows)} signals, approx. tokens (chars / {_CHARS_PER_TOKEN}):")
+    for source, (before, after) in sorted(by_source.items()):
+        saved = 1 - after / before if before else 0.0
+        print(f"  {source:<22} {before // _CHARS_PER_TOKEN:>8} -> {after // _CHARS_PER_TOKEN:>8}  ({saved:.0%} saved)")
+
+
+if __name__ == "__main__":
+    _report()
@@ -42,6 +42,112 @@ CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-haiku-4-5-20251001")
 SCORE_THRESHOLD = int(os.getenv("SCORE_THRESHOLD", "71"))
 HF_SCORE_THRESHOLD = int(os.getenv("HF_SCORE_THRESHOLD", "20"))
 
+# --- Scoring engine (concurrent Haiku calls behind a token-bucket limiter) ---
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "4"))
+SCORING_RPM = int(os.getenv("SCORING_RPM", "50"))          # requests per minute
+SCORING_TPM = int(os.getenv("SCORING_TPM", "50000"))       # input tokens per minute
+SCORING_MAX_RETRIES = int(os.getenv("SCORING_MAX_RETRIES", "4"))  # on 429, 5xx, connection errors
+SCORING_TIMEOUT_SECONDS = float(os.getenv("SCORING_TIMEOUT_SECONDS", "30"))  # per API call
+# Consecutive connection/5xx failures before all scoring calls pause for the cooldown
+SCORING_BREAKER_THRESHOLD = int(os.getenv("SCORING_BREAKER_THRESHOLD", "5"))
+SCORING_BREAKER_COOLDOWN_SECONDS = float(os.getenv("SCORING_BREAKER_COOLDOWN_SECONDS", "60"))
+# Runs a failed signal is retried in before it is stored unscored
+SCORING_RESCORE_MAX_ATTEMPTS = int(os.getenv("SCORING_RESCORE_MAX_ATTEMPTS", "5"))
+# Days a signal may keep being deferred by the run budget before it is stored unscored
+SCORING_DEFER_MAX_DAYS = float(os.getenv("SCORING_DEFER_MAX_DAYS", "7"))
+# Per-run budget (0 = unlimited). Once spent, remaining signals carry over to
+# the next run instead of being scored; see priority.py for the order.
+SCORING_RUN_MAX_CALLS = int(os.getenv("SCORING_RUN_MAX_CALLS", "1000"))
+SCORING_RUN_MAX_TOKENS = int(os.getenv("SCORING_RUN_MAX_TOKENS", "2000000"))  # input + output
+# Signals below this priority wait until every source has finished, then
+# compete for whatever budget is left
+SCORING_HOLD_BELOW_PRIORITY = float(os.getenv("SCORING_HOLD_BELOW_PRIORITY", "2.0"))
+
+# --- Scoring priority (highest first when the budget is tight) ---
+SOURCE_PRIORITY = {
+    "reddit": 3.0,
+    "github": 3.0,
+    "reddit_comment": 2.0,
+    "huggingface": 2.0,
+    "huggingface_health": 1.0,
+    "alphaxiv": 1.0,
+    "alphaxiv_digest": 0.5,
+    "huggingface_dataset": 0.5,
+}
+# Added once per keyword cluster the title/text hits (see KEYWORD_CLUSTERS)
+CLUSTER_PRIORITY = {
+    "need": 3.0,
+    "budget": 3.0,
+    "competitor": 2.0,
+    "rlhf": 2.0,
+    "pain": 1.5,
+    "synthetic_disillusionment": 1.5,
+    "post_training": 1.0,
+    "frustration": 0.5,
+}
+# Signals submitted but not yet scored; above this the pipeline stops pulling
+# from sources until the backlog drains (bounds memory on busy days).
+SCORING_MAX_OUTSTANDING = int(os.getenv("SCORING_MAX_OUTSTANDING", "200"))
+# Pack several signals into one request so the system prompt is sent once per
+# pack rather than once per signal. Set SCORING_PACK_MAX_SIGNALS=1 to disable.
+SCORING_PACK_MAX_SIGNALS = int(os.getenv("SCORING_PACK_MAX_SIGNALS", "8"))
+SCORING_PACK_TOKEN_BUDGET = int(os.getenv("SCORING_PACK_TOKEN_BUDGET", "4000"))  # signal tokens per pack
+
+# --- Scoring backend ---
+# "sync": concurrent Messages API calls. "batch": one Message Batch per run
+# (half price, results within minutes to hours) — used by the daily cron.
+SCORING_MODE = os.getenv("SCORING_MODE", "sync")
+SCORING_BATCH_MIN_SIZE = int(os.getenv("SCORING_BATCH_MIN_SIZE", "20"))  # smaller runs score synchronously
+SCORING_BATCH_POLL_SECONDS = int(os.getenv("SCORING_BATCH_POLL_SECONDS", "30"))
+SCORING_BATCH_TIMEOUT_SECONDS = int(os.getenv("SCORING_BATCH_TIMEOUT_SECONDS", "3600"))
+# After cancelling a timed-out batch, how long to wait for it to end and keep its finished results
+SCORING_BATCH_CANCEL_GRACE_SECONDS = int(os.getenv("SCORING_BATCH_CANCEL_GRACE_SECONDS", "300"))
+
+# --- Local pre-scorer (skips Haiku for signals that are confidently noise) ---
+PRESCORE_ENABLED = os.getenv("PRESCORE_ENABLED", "true").lower() in ("1", "true", "yes")
+PRESCORE_SKIP_PROBABILITY = float(os.getenv("PRESCORE_SKIP_PROBABILITY", "0.05"))  # skip below this P(lead)
+PRESCORE_MIN_RECALL = float(os.getenv("PRESCORE_MIN_RECALL", "0.98"))  # held-out lead recall to enable
+PRESCORE_HOLDOUT_FRACTION = float(os.getenv("PRESCORE_HOLDOUT_FRACTION", "0.2"))
+PRESCORE_MIN_SIGNALS = int(os.getenv("PRESCORE_MIN_SIGNALS", "500"))
+PRESCORE_MIN_LEADS = int(os.getenv("PRESCORE_MIN_LEADS", "20"))
+PRESCORE_AUDIT_RATE = float(os.getenv("PRESCORE_AUDIT_RATE", "0.05"))  # would-be skips still sent to Haiku
+
+# --- Near-duplicate detection (SimHash; see neardup.py) ---
+NEARDUP_ENABLED = os.getenv("NEARDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+NEARDUP_MAX_DISTANCE = int(os.getenv("NEARDUP_MAX_DISTANCE", "5"))  # differing bits out of 64
+NEARDUP_MIN_WORDS = int(os.getenv("NEARDUP_MIN_WORDS", "15"))  # shorter texts are never clustered
+NEARDUP_WINDOW_DAYS = int(os.getenv("NEARDUP_WINDOW_DAYS", "14"))
+
+# --- Input compaction (see compaction.py) ---
+# Token budget for a signal's text after code, logs, boilerplate and quotes are stripped
+SCORING_TEXT_MAX_TOKENS = int(os.getenv("SCORING_TEXT_MAX_TOKENS", "400"))
+
+# --- Haiku pricing, USD per million tokens (for the per-run cost rollup) ---
+HAIKU_PRICE_INPUT = float(os.getenv("HAIKU_PRICE_INPUT", "1.00"))
+HAIKU_PRICE_OUTPUT = float(os.getenv("HAIKU_PRICE_OUTPUT", "5.00"))
+HAIKU_PRICE_CACHE_WRITE = float(os.getenv("HAIKU_PRICE_CACHE_WRITE", "1.25"))
+HAIKU_PRICE_CACHE_READ = float(os.getenv("HAIKU_PRICE_CACHE_READ", "0.10"))
+HAIKU_BATCH_DISCOUNT = float(os.getenv("HAIKU_BATCH_DISCOUNT", "0.5"))  # Message Batches multiplier
+
+# --- Score cache (identical content is scored once, see scoring.cache_key) ---
+SCORE_CACHE_TTL_DAYS = int(os.getenv("SCORE_CACHE_TTL_DAYS", "30"))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+
+# --- Source fetching (all sources run in parallel on a worker pool) ---
+SOURCE_WORKERS = int(os.getenv("SOURCE_WORKERS", "5"))
+# Bounded queue between source generators and the dedup/scoring consumer
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "500"))
+# Wall-clock deadline per source, in seconds. A source still running at its
+# deadline is cancelled and the run continues without its results.
+SOURCE_DEADLINE_SECONDS = int(os.getenv("SOURCE_DEADLINE_SECONDS", "600"))
+SOURCE_DEADLINES = {
+    "reddit": int(os.getenv("SOURCE_DEADLINE_REDDIT", str(SOURCE_DEADLINE_SECONDS))),
+    "github": int(os.getenv("SOURCE_DEADLINE_GITHUB", str(SOURCE_DEADLINE_SECONDS))),
+    "huggingface": int(os.getenv("SOURCE_DEADLINE_HUGGINGFACE", str(SOURCE_DEADLINE_SECONDS))),
+    "alphaxiv_web": int(os.getenv("SOURCE_DEADLINE_ALPHAXIV_WEB", "60")),
+    "alphaxiv_digest": int(os.getenv("SOURCE_DEADLINE_ALPHAXIV_DIGEST", "120")),
+}
+
 # --- Reddit subreddits to monitor ---
 SUBREDDITS = [
     "MachineLearning",
@@ -50,6 +156,21 @@ SUBREDDITS = [
     "indiehackers",
 ]
 
+# Reddit /new and /comments are read back to each subreddit's cursors (see sources/reddit.py).
+# The first run for a subreddit looks back this far; the cap bounds a run on
+# a very busy day (Reddit listings stop at ~1000 anyway).
+REDDIT_BACKFILL_HOURS = int(os.getenv("REDDIT_BACKFILL_HOURS", "48"))
+REDDIT_MAX_POSTS_PER_RUN = int(os.getenv("REDDIT_MAX_POSTS_PER_RUN", "1000"))
+REDDIT_MAX_COMMENTS_PER_RUN = int(os.getenv("REDDIT_MAX_COMMENTS_PER_RUN", "1000"))
+
+# Keyword searches are OR-combined into queries of at most this many chars
+# (Reddit's limit is 512) and run over all SUBREDDITS at once.
+REDDIT_SEARCH_QUERY_MAX_CHARS = int(os.getenv("REDDIT_SEARCH_QUERY_MAX_CHARS", "500"))
+REDDIT_SEARCH_LIMIT = int(os.getenv("REDDIT_SEARCH_LIMIT", "100"))
+REDDIT_SEARCH_CONCURRENCY = int(os.getenv("REDDIT_SEARCH_CONCURRENCY", "3"))
+# Script apps get 100 requests/min
+REDDIT_RPM = int(os.getenv("REDDIT_RPM", "100"))
+
 # --- GitHub repos to prioritize (owner/repo) ---
 # Focus: repos where ML practitioners doing post-training (RLHF, DPO, fine-tune, eval)
 # file issues about data quality. These users ARE the ICP, not researchers or tool devs.
@@ -93,8 +214,32 @@ GITHUB_SEARCH_QUERIES = [
     '"synthetic data" OR "GPT-generated" OR "model collapse" OR "LLM-generated" "quality" OR "not working" OR "degraded"',
 ]
 
+# Search results per page (max 100); search returns at most 1,000 per query,
+# past which the date window is split (see sources/github.py)
+GITHUB_PER_PAGE = int(os.getenv("GITHUB_PER_PAGE", "100"))
+GITHUB_SEARCH_RESULT_CAP = 1000
+# Priority repos: "graphql" (batched, no search quota) or "search" (one search per repo)
+GITHUB_REPO_SCAN = os.getenv("GITHUB_REPO_SCAN", "graphql")
+GITHUB_GRAPHQL_REPOS_PER_QUERY = int(os.getenv("GITHUB_GRAPHQL_REPOS_PER_QUERY", "20"))
+GITHUB_GRAPHQL_PAGE_SIZE = int(os.getenv("GITHUB_GRAPHQL_PAGE_SIZE", "50"))
+# Replay GraphQL responses from this JSON file (offline testing); with
+# GITHUB_GRAPHQL_RECORD set, requests missing from it are fetched and added
+GITHUB_GRAPHQL_FIXTURE = os.getenv("GITHUB_GRAPHQL_FIXTURE", "")
+GITHUB_GRAPHQL_RECORD = os.getenv("GITHUB_GRAPHQL_RECORD", "false").lower() in ("1", "true", "yes")
+# Longest the GitHub client will sleep for a rate-limit reset before giving up on a phase
+GITHUB_MAX_RATE_WAIT_SECONDS = int(os.getenv("GITHUB_MAX_RATE_WAIT_SECONDS", "90"))
+# Conditional-request (ETag) cache entries older than this are dropped
+HTTP_CACHE_TTL_DAYS = int(os.getenv("HTTP_CACHE_TTL_DAYS", "7"))
+
 # --- Lookback window for GitHub issue scanning ---
+# Only used on a query's first run (no cursor yet) or with GITHUB_BACKFILL set;
+# otherwise each query resumes from its last completed run (see sources/github.py).
 GITHUB_LOOKBACK_DAYS = 14
+GITHUB_BACKFILL = os.getenv("GITHUB_BACKFILL", "false").lower() in ("1", "true", "yes")
+# "created" or "updated" — which issue timestamp the cursor is compared with
+GITHUB_CURSOR_FIELD = os.getenv("GITHUB_CURSOR_FIELD", "created")
+# Re-read this much before the cursor; new issues can take a while to be searchable
+GITHUB_CURSOR_OVERLAP_MINUTES = int(os.getenv("GITHUB_CURSOR_OVERLAP_MINUTES", "60"))
 
 # --- Hugging Face datasets to watch for health/discussions ---
 HF_WATCHED_DATASETS = [
@@ -103,6 +248,12 @@ HF_WATCHED_DATASETS = [
     "HuggingFaceH4/ultrafeedback_binarized",
 ]
 
+# Parallel discussion-detail fetches, and the longest an unchanged thread goes unread
+HF_DISCUSSION_CONCURRENCY = int(os.getenv("HF_DISCUSSION_CONCURRENCY", "8"))
+HF_DISCUSSION_RECHECK_MAX_DAYS = int(os.getenv("HF_DISCUSSION_RECHECK_MAX_DAYS", "30"))
+# Concurrent datasets-server health probes
+HF_HEALTH_CONCURRENCY = int(os.getenv("HF_HEALTH_CONCURRENCY", "16"))
+
 # --- Keyword clusters ---
 PAIN_KEYWORDS = [
     "annotation quality", "labeling errors", "noisy labels",
@@ -160,12 +311,31 @@ ALL_KEYWORDS = (
     POST_TRAINING_KEYWORDS
 )
 
+# Clusters by name, as reported by keywords.match_keywords()
+KEYWORD_CLUSTERS = {
+    "pain": PAIN_KEYWORDS,
+    "need": NEED_KEYWORDS,
+    "rlhf": RLHF_KEYWORDS,
+    "competitor": COMPETITOR_KEYWORDS,
+    "frustration": FRUSTRATION_KEYWORDS,
+    "synthetic_disillusionment": SYNTHETIC_DISILLUSIONMENT_KEYWORDS,
+    "budget": BUDGET_KEYWORDS,
+    "post_training": POST_TRAINING_KEYWORDS,
+}
+
+# Searched on Reddit in addition to scanning /new (see sources/reddit.py)
+REDDIT_SEARCH_KEYWORDS = NEED_KEYWORDS + RLHF_KEYWORDS[:3]
+
 # --- Paths ---
 DATA_DIR = PROJECT_DIR / "data"
 DB_PATH = DATA_DIR / "signals.db"
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))  # page cache per connection
 
 # --- Cross-tool dedup ---
 AUTO_BDR_OUTREACH_LOG = os.getenv(
     "AUTO_BDR_OUTREACH_LOG",
     str(PROJECT_DIR.parent / "auto-bdr" / "data" / "outreach_log.csv"),
 )
+# "substring": author appears anywhere in any cell (historical behaviour).
+# "exact": normalized handle equality — faster and no false hits on short names.
+OUTREACH_MATCH_MODE = os.getenv("OUTREACH_MATCH_MODE", "substring")
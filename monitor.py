@@ -1,100 +1,414 @@
-"""Main orchestrator — scans all sources, scores signals, notifies on leads."""
+"""Main orchestrator — scans all sources, scores signals, notifies on leads.
 
+Sources stream into a bounded queue; new signals are queued in
+``pending_rescore`` before scoring, so a run that dies leaves them to the next.
+"""
+
+import itertools
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import config
 import storage
 import scoring
+import neardup
 import notify
+import prescorer
+import priority
+import sources
+from scoring_batch import BatchScoringEngine
+from scoring_engine import ScoringEngine
 from sources import reddit, github, huggingface, alphaxiv_web, alphaxiv_digest
 
 
-def run():
-    print("=" * 60)
-    print("Data Deal Monitor")
-    print("=" * 60)
+# (display name, config.SOURCE_DEADLINES key, signal generator)
+SOURCES = [
+    ("Reddit", "reddit", reddit.iter_signals),
+    ("GitHub", "github", github.iter_signals),
+    ("Hugging Face", "huggingface", huggingface.iter_signals),
+    ("AlphaXiv Web", "alphaxiv_web", alphaxiv_web.iter_signals),
+    ("AlphaXiv Digest", "alphaxiv_digest", alphaxiv_digest.iter_signals),
+]
 
-    # Initialize database
-    storage.init_db()
+# How often the main thread wakes to check deadlines and collect scores
+POLL_INTERVAL = 0.5
 
-    # Collect signals from all sources (graceful degradation)
-    all_signals = []
-    sources = [
-        ("Reddit", reddit.fetch_signals),
-        ("GitHub", github.fetch_signals),
-        ("Hugging Face", huggingface.fetch_signals),
-        ("AlphaXiv Web", alphaxiv_web.fetch_signals),
-        ("AlphaXiv Digest", alphaxiv_digest.fetch_signals),
-    ]
-
-    for name, fetch_fn in sources:
-        print(f"\nScanning {name}...")
+# Most signals pulled off the queue and deduped in one go
+DEDUP_BATCH_SIZE = 100
+
+# Scored signals committed per transaction as results come in
+COLLECT_BATCH_SIZE = 20
+
+
+class _Intake:
+    """Bounded queue from the source threads to the main thread.
+
+    Whatever ``put`` accepts is consumed: ``close()`` shuts the intake under
+    the same lock ``put`` holds, and the main thread drains the queue after
+    closing it.
+    """
+
+    def __init__(self, maxsize: int):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def put(self, item: tuple, cancel_event: threading.Event) -> bool:
+        """Enqueue ``item``; False once the intake is closed or the source cancelled."""
+        while True:
+            with self._lock:
+                if self._closed or cancel_event.is_set():
+                    return False
+                try:
+                    self._queue.put(item, timeout=POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+
+    def take(self, timeout: float) -> list[tuple]:
+        """Block up to ``timeout`` for one event, then drain what is ready."""
         try:
-            signals = fetch_fn()
-            all_signals.extend(signals)
-        except Exception as e:
-            print(f"  [{name}] Fatal error: {e}")
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < DEDUP_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
 
-    print(f"\nTotal raw signals: {len(all_signals)}")
+    def close(self) -> list[tuple]:
+        """Refuse further puts and return everything still queued."""
+        with self._lock:
+            self._closed = True
+        remaining = []
+        while True:
+            try:
+                remaining.append(self._queue.get_nowait())
+            except queue.Empty:
+                return remaining
+
+
+def _produce(name: str, iter_fn, intake: _Intake, cancel_event: threading.Event):
+    """Worker-thread producer: stream one source's signals into the intake.
+
+    The source generator is only resumed once its last signal was accepted,
+    so progress it saves after a ``yield`` never covers a dropped signal.
+    Finishes with a ``("done", name, status, elapsed)`` event unless the
+    source was cancelled first.
+    """
+    sources.bind_cancel_event(cancel_event)
+    start = time.monotonic()
+    status = "ok"
+    try:
+        for signal in iter_fn():
+            if not intake.put(("signal", name, signal), cancel_event):
+                break
+    except Exception as e:
+        print(f"  [{name}] Fatal error: {e}")
+        status = "error"
+    finally:
+        sources.bind_cancel_event(None)
+        intake.put(("done", name, status, time.monotonic() - start), cancel_event)
+
+
+def _dedup(signals: list[dict], queued: set) -> list[dict]:
+    """Drop signals already seen, already queued this run, or already contacted via auto-bdr.
+
+    Accepted URLs are added to ``queued`` — scoring is asynchronous, so
+    ``seen_urls`` alone cannot catch the same URL arriving from two sources.
+    """
+    unseen = set(storage.filter_unseen(
+        signal.get("url", "") for signal in signals
+        if signal.get("url", "") not in queued
+    ))
 
-    # Dedup against seen URLs
     new_signals = []
-    for signal in all_signals:
+    contacted = []
+    for signal in signals:
         url = signal.get("url", "")
-        if not url:
-            continue
-        if storage.is_seen(url):
+        if url not in unseen:
             continue
+        unseen.discard(url)  # first occurrence wins
         # Cross-tool dedup with auto-bdr
         author = signal.get("author", "")
         if author and storage.is_in_outreach_log(author):
-            storage.mark_seen(url)
+            contacted.append(url)
             continue
+        queued.add(url)
         new_signals.append(signal)
 
-    print(f"New (unseen) signals: {len(new_signals)}")
+    storage.mark_seen_many(contacted)
+    return new_signals
 
-    if not new_signals:
-        print("\nNo new signals to process.")
-        return
 
-    # Score each signal with Claude Haiku
-    print(f"\nScoring {len(new_signals)} signals with Claude Haiku...")
-    leads_found = 0
-    total_scored = 0
+def _store_duplicates(url: str, scores: dict, duplicates: list[dict]):
+    """Save near-duplicates of ``url`` with its scores, linked via duplicate_of."""
+    for duplicate in duplicates:
+        storage.save_signal(duplicate, scores, scored_by="duplicate", duplicate_of=url)
+        storage.mark_seen(duplicate.get("url", ""))
+        storage.remove_pending_rescore(duplicate.get("url", ""))
 
-    for i, signal in enumerate(new_signals, 1):
-        url = signal.get("url", "")
-        title = signal.get("title", "")[:60]
-        print(f"  [{i}/{len(new_signals)}] {title}...")
 
-        scores = scoring.score_signal(signal)
-        total = scores.get("total_score", 0)
-        total_scored += 1
+def _link_near_duplicates(signals: list[dict], pending: dict) -> list[dict]:
+    """Return the signals that still need scoring; link the rest to their representative.
+
+    ``pending`` maps each representative awaiting scores this run to its
+    near-duplicates, which are stored once the representative is.
+    """
+    to_score = []
+    for signal, representative in neardup.cluster(signals):
+        if representative is None:
+            pending[signal.get("url", "")] = []
+            to_score.append(signal)
+        elif representative in pending:
+            pending[representative].append(signal)
+        elif (scores := storage.get_signal_scores(representative)) is not None:
+            _store_duplicates(representative, scores, [signal])
+        else:
+            to_score.append(signal)  # representative never got stored
+    return to_score
 
-        # Save to database
-        storage.save_signal(signal, scores)
+
+def _skip_noise(signals: list[dict], gate: prescorer.Gate, pending: dict) -> list[dict]:
+    """Store signals the pre-scorer is confident are noise; return the rest."""
+    to_score, skipped = gate.partition(signals)
+    for signal, probability in skipped:
+        url = signal.get("url", "")
+        scores = prescorer.skipped_scores(probability)
+        storage.save_signal(signal, scores, scored_by="prescorer")
         storage.mark_seen(url)
+        storage.remove_pending_rescore(url)
+        _store_duplicates(url, scores, pending.pop(url, []))
+    return to_score
+
 
-        # Notify if above threshold (HuggingFace uses a lower threshold)
-        source = signal.get("source", "")
-        threshold = config.HF_SCORE_THRESHOLD if source.startswith("huggingface") else config.SCORE_THRESHOLD
-        if total >= threshold:
-            leads_found += 1
-            notify.notify_lead(signal, scores)
-            storage.mark_notified(url)
-            tier = "ACTIVE BUYER" if total >= 86 else "PRIORITY" if total >= 71 else "Lead"
-            print(f"    -> {tier} (score: {total}) — {scores.get('category', '')}")
+def _defer_rescore(signal: dict, scores: dict, pending: dict) -> int:
+    """Queue a signal that failed to score or was deferred (and its near-duplicates) for the next run.
+
+    Signals are not marked seen, so they are not lost. After
+    ``SCORING_RESCORE_MAX_ATTEMPTS`` failures one is stored unscored instead;
+    budget deferrals don't count as failures, but a signal still queued
+    ``SCORING_DEFER_MAX_DAYS`` after it was first queued is given up on too.
+    Returns how many signals were queued.
+    """
+    url = signal.get("url", "")
+    deferred = scores.get("deferred", False)
+    queued = 0
+    for item in [signal] + pending.pop(url, []):
+        attempts, age_days = storage.add_pending_rescore(
+            item, scores.get("reasoning", ""), count_attempt=not deferred
+        )
+        if deferred:
+            keep = age_days < config.SCORING_DEFER_MAX_DAYS
         else:
-            print(f"    -> Logged (score: {total})")
+            keep = attempts < config.SCORING_RESCORE_MAX_ATTEMPTS
+        if keep:
+            queued += 1
+            continue
+        reason = f"{age_days:.0f} days in the queue" if deferred else f"{attempts} attempts"
+        print(f"  [rescore] Giving up on {item.get('url', '')} after {reason}")
+        # Not "haiku": zero scores nobody produced must not train the pre-scorer
+        storage.save_signal(item, scores, scored_by="unscored")
+        storage.mark_seen(item.get("url", ""))
+        storage.remove_pending_rescore(item.get("url", ""))
+    return queued
+
+
+def _store_scored(signal: dict, scores: dict, pending: dict) -> bool:
+    """Persist a scored signal. Returns True for a lead, which the caller notifies."""
+    url = signal.get("url", "")
+    total = scores.get("total_score", 0)
+    print(f"  {signal.get('title', '')[:60]}...")
+
+    # Save to database, along with any near-duplicates waiting on this one
+    storage.save_signal(signal, scores)
+    storage.mark_seen(url)
+    storage.remove_pending_rescore(url)
+    duplicates = pending.pop(url, [])
+    _store_duplicates(url, scores, duplicates)
+    if duplicates:
+        print(f"    + {len(duplicates)} near-duplicate(s) linked")
+
+    # Notify if above threshold (HuggingFace uses a lower threshold)
+    source = signal.get("source", "")
+    threshold = config.HF_SCORE_THRESHOLD if source.startswith("huggingface") else config.SCORE_THRESHOLD
+    if total >= threshold:
+        tier = "ACTIVE BUYER" if total >= 86 else "PRIORITY" if total >= 71 else "Lead"
+        print(f"    -> {tier} (score: {total}) — {scores.get('category', '')}")
+        return True
+
+    print(f"    -> Logged (score: {total})")
+    return False
+
+
+def run():
+    print("=" * 60)
+    print("Data Deal Monitor")
+    print("=" * 60)
+
+    # Initialize database
+    storage.init_db()
+    evicted = storage.prune_score_cache()
+    if evicted:
+        print(f"Evicted {evicted} stale score-cache entries")
+    storage.prune_simhashes()
+    storage.prune_http_cache()
+
+    gate = prescorer.train_gate()
+    engine = BatchScoringEngine() if config.SCORING_MODE == "batch" else ScoringEngine()
+    intake = _Intake(config.PIPELINE_QUEUE_SIZE)
+    pool = ThreadPoolExecutor(
+        max_workers=config.SOURCE_WORKERS, thread_name_prefix="source"
+    )
+    queued = set()
+    # Representative URL -> near-duplicates waiting on its scores
+    pending = {}
+    total_new = 0
+    total_duplicates = 0
+    leads_found = 0
+    total_scored = 0
+    total_deferred = 0
+
+    # Signals that failed or were deferred last time get a priority boost
+    rescore = sorted(storage.get_pending_rescores(), key=priority.priority, reverse=True)
+    if rescore:
+        print(f"\nRescoring {len(rescore)} signals from previous runs...")
+    for signal in rescore:
+        queued.add(signal.get("url", ""))
+        engine.submit(signal, boost=priority.CARRYOVER_BONUS)
+
+    started = time.monotonic()
+
+    # Sources still producing, by name; each entry is dropped once the
+    # source reports done or misses its deadline.
+    active = {}
+    source_stats = {}
+    for name, key, iter_fn in SOURCES:
+        print(f"\nScanning {name}...")
+        cancel_event = threading.Event()
+        deadline = started + config.SOURCE_DEADLINES.get(key, config.SOURCE_DEADLINE_SECONDS)
+        stat = {"name": name, "count": 0, "elapsed": 0.0, "status": "running"}
+        active[name] = {"cancel": cancel_event, "deadline": deadline}
+        source_stats[name] = stat
+        pool.submit(_produce, name, iter_fn, intake, cancel_event)
+
+    def collect(results):
+        # Scores commit in chunks as they arrive, so a long drain keeps what
+        # it has scored if it fails part-way. Slack is only called once a
+        # chunk has committed: no write lock held during the request, and no
+        # alert for a lead a rollback would score again.
+        nonlocal leads_found, total_scored, total_deferred
+        results = iter(results)
+        while chunk := list(itertools.islice(results, COLLECT_BATCH_SIZE)):
+            leads = []
+            with storage.batch():
+                for signal, scores in chunk:
+                    if scores.get("failed"):
+                        total_deferred += _defer_rescore(signal, scores, pending)
+                        continue
+                    if _store_scored(signal, scores, pending):
+                        leads.append((signal, scores))
+                    total_scored += 1
+            for signal, scores in leads:
+                notify.notify_lead(signal, scores)
+                storage.mark_notified(signal.get("url", ""))
+            leads_found += len(leads)
+
+    def ingest(batch):
+        # Sources advance their cursors once a signal is on the queue, so
+        # every new signal is written to pending_rescore before it goes on
+        # to scoring, in the same transaction as dedup. If the run dies
+        # before storing it, the next run picks it up from there.
+        nonlocal total_new, total_duplicates
+        raw = []
+        for event in batch:
+            kind, name = event[0], event[1]
+            stat = source_stats[name]
+            if kind == "signal":
+                stat["count"] += 1
+                raw.append(event[2])
+            elif name in active:
+                stat["status"], stat["elapsed"] = event[2], event[3]
+                del active[name]
+        if not raw:
+            return
+        with storage.batch():
+            new_signals = _dedup(raw, queued)
+            total_new += len(new_signals)
+            storage.queue_pending_rescores(new_signals, "Queued for scoring")
+            if config.NEARDUP_ENABLED:
+                representatives = _link_near_duplicates(new_signals, pending)
+                total_duplicates += len(new_signals) - len(representatives)
+                new_signals = representatives
+            if gate is not None:
+                new_signals = _skip_noise(new_signals, gate, pending)
+        for signal in new_signals:
+            engine.submit(signal)
+
+    try:
+        while active:
+            collect(engine.completed())
+
+            # Backpressure: let the scoring backlog drain before pulling more
+            if engine.outstanding >= config.SCORING_MAX_OUTSTANDING:
+                collect(engine.completed(timeout=POLL_INTERVAL))
+            else:
+                ingest(intake.take(POLL_INTERVAL))
+
+            now = time.monotonic()
+            for name, state in list(active.items()):
+                if now < state["deadline"]:
+                    continue
+                state["cancel"].set()
+                source_stats[name]["status"] = "timeout"
+                source_stats[name]["elapsed"] = now - started
+                del active[name]
+                print(f"  [{name}] Deadline exceeded after {now - started:.0f}s — cancelled")
+
+        # Whatever the sources queued before the intake closed still gets scored
+        ingest(intake.close())
 
-        # Small delay to respect API rate limits
-        time.sleep(0.5)
+        if engine.outstanding:
+            print(f"\nAll sources finished — waiting on {engine.outstanding} scoring calls...")
+        collect(engine.drain())
+        usage = scoring.run_usage()
+    finally:
+        for state in active.values():
+            state["cancel"].set()
+        intake.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        engine.close()
+        storage.close()
 
     # Summary
+    total_raw = sum(stat["count"] for stat in source_stats.values())
     print("\n" + "=" * 60)
+    for stat in source_stats.values():
+        print(
+            f"  {stat['name']:<16} {stat['status']:<8} "
+            f"{stat['elapsed']:6.1f}s  {stat['count']} signals"
+        )
+    print(f"Raw signals: {total_raw} | New (unseen): {total_new} | Near-duplicates: {total_duplicates}")
+    stats = scoring.get_stats()
     print(f"Scored: {total_scored} | Leads sent to Slack: {leads_found}")
+    if rescore or total_deferred:
+        print(f"Retried from last run: {len(rescore)} | Deferred for rescore: {total_deferred}")
+    print(f"Haiku calls: {stats['api_calls']} | Score-cache hits: {stats['cache_hits']}")
+    if gate is not None:
+        print(f"Pre-scorer skipped: {gate.skipped} | Audited: {gate.audited}")
+    if usage["calls"]:
+        per_lead = f"${usage['cost'] / leads_found:.4f}" if leads_found else "n/a"
+        print(
+            f"Tokens: {usage['input_tokens']} in / {usage['output_tokens']} out | "
+            f"Prompt cache: {usage['cache_read_tokens']} read / {usage['cache_write_tokens']} "
+            f"written ({usage['cache_hit_rate']:.0%} hit)"
+        )
+        print(f"Est. cost: ${usage['cost']:.4f} | Per lead: {per_lead}")
     print(f"Threshold: {config.SCORE_THRESHOLD}/100")
     print("=" * 60)
 
@@ -0,0 +1,97 @@
+"""Near-duplicate detection with SimHash + banded LSH.
+
+Exact URL dedup misses the same complaint cross-posted to two subreddits,
+issues copied between repos, and comments that quote their parent post.
+Each signal's title and text are reduced to a 64-bit SimHash over word
+3-shingles; two signals whose hashes differ in at most
+``NEARDUP_MAX_DISTANCE`` bits are treated as the same content.
+
+Hashes are indexed in SQLite split into ``NEARDUP_MAX_DISTANCE + 1``
+bands. Two hashes within that distance differ in fewer bits than there are
+bands, so they must agree exactly on at least one band (pigeonhole), and a
+band lookup finds every candidate without scanning the table. The index
+covers this run and the last ``NEARDUP_WINDOW_DAYS`` days; after changing
+``NEARDUP_MAX_DISTANCE``, older entries stop matching until they age out.
+
+Very short texts (most arXiv titles) are not hashed: with a handful of
+shingles, unrelated texts collide too easily. Nor are dataset health
+incidents: their text is a template, so a repeat incident on one dataset
+(or the same failure on another) would look like a copy of the last one.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+import config
+import storage
+
+
+_WORD_RE = re.compile(r"\w+")
+_SHINGLE_SIZE = 3
+# Sources whose text is generated rather than written, so never clustered
+_UNCLUSTERED_SOURCES = {"huggingface_health"}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int | None:
+    """64-bit SimHash of ``text``, or None if it has too few words to be reliable."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < config.NEARDUP_MIN_WORDS:
+        return None
+    shingles = Counter(
+        " ".join(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)
+    )
+    hashes = [(_hash64(shingle), weight) for shingle, weight in shingles.items()]
+    value = 0
+    for bit in range(64):
+        mask = 1 << bit
+        total = sum(weight if h & mask else -weight for h, weight in hashes)
+        if total > 0:
+            value |= mask
+    return value
+
+
+def signal_simhash(signal: dict) -> int | None:
+    """SimHash over the title and content Haiku would see."""
+    return simhash(f"{signal.get('title', '')}\n{signal.get('text', '')[:2000]}")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bands(value: int, count: int | None = None) -> list[int]:
+    """Split a 64-bit hash into ``count`` contiguous bands (default: max distance + 1)."""
+    count = count or config.NEARDUP_MAX_DISTANCE + 1
+    edges = [64 * i // count for i in range(count + 1)]
+    return [(value >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+
+
+def cluster(signals: list[dict]) -> list[tuple[dict, str | None]]:
+    """Pair each signal with the URL of the representative it duplicates, or None.
+
+    Signals with no near-duplicate become representatives and are indexed
+    straight away, so later signals in the same list cluster onto them.
+    """
+    result = []
+    for signal in signals:
+        url = signal.get("url", "")
+        value = signal_simhash(signal) if signal.get("source") not in _UNCLUSTERED_SOURCES else None
+        if value is None or not url:
+            result.append((signal, None))
+            continue
+
+        best, best_distance = None, config.NEARDUP_MAX_DISTANCE + 1
+        for candidate_url, candidate in storage.find_simhash_candidates(bands(value)):
+            distance = hamming(value, candidate)
+            if distance < best_distance and candidate_url != url:
+                best, best_distance = candidate_url, distance
+
+        if best is None:
+            storage.add_simhash(url, value, bands(value))
+        result.append((signal, best))
+    return result
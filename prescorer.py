@@ -0,0 +1,197 @@
+"""Local pre-scorer that gates Haiku calls.
+
+Most signals score far below the notification threshold. A hashed-feature
+logistic regression, trained at startup on every signal Haiku has already
+scored, estimates the probability that a new signal would be a lead (total
+score at or above its source's threshold). Signals below
+``PRESCORE_SKIP_PROBABILITY`` are stored as noise without a Haiku call.
+
+Before the gate is switched on, it is checked against the most recent
+``PRESCORE_HOLDOUT_FRACTION`` of history (time-ordered, never trained on).
+If that held-out recall on leads is below ``PRESCORE_MIN_RECALL``, or there
+is too little history, every signal goes to Haiku as before. A small
+``PRESCORE_AUDIT_RATE`` of would-be skips is still scored, so the model
+keeps getting labels for the region it is filtering.
+
+Requires numpy; without it the gate is disabled.
+"""
+
+import json
+import random
+import re
+import zlib
+
+import config
+import storage
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def lead_threshold(source: str) -> int:
+    """Notification threshold for a source (Hugging Face uses a lower one)."""
+    return config.HF_SCORE_THRESHOLD if source.startswith("huggingface") else config.SCORE_THRESHOLD
+
+
+class PreScorer:
+    """Hashed unigram+bigram logistic regression over title, text and source."""
+
+    def __init__(self, dims: int = 2 ** 18):
+        self.dims = dims
+        self.weights = np.zeros(dims, dtype=np.float64)
+        self.bias = 0.0
+
+    def features(self, signal: dict) -> list[int]:
+        """Hashed feature indices for a signal (deduplicated)."""
+        text = f"{signal.get('title', '')}\n{signal.get('text', '')[:2000]}"
+        tokens = _TOKEN_RE.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        source = signal.get("source", "")
+        grams.append(f"source={source}")
+        for field in ("subreddit", "repo", "dataset_id"):
+            if signal.get(field):
+                grams.append(f"{field}={signal[field]}")
+        return sorted({zlib.crc32(g.encode("utf-8")) % self.dims for g in grams})
+
+    def _matrix(self, signals: list[dict]):
+        """Flattened feature indices, per-entry values and row ids (CSR-like)."""
+        rows = [self.features(signal) for signal in signals]
+        lengths = np.array([len(r) for r in rows], dtype=np.int64)
+        indices = np.fromiter((i for r in rows for i in r), dtype=np.int64, count=int(lengths.sum()))
+        row_ids = np.repeat(np.arange(len(rows)), lengths)
+        # L2-normalize each row so long posts don't dominate
+        values = np.repeat(1.0 / np.sqrt(np.maximum(lengths, 1)), lengths)
+        return indices, values, row_ids, len(rows)
+
+    def _logits(self, indices, values, row_ids, n_rows):
+        return np.bincount(row_ids, weights=self.weights[indices] * values, minlength=n_rows) + self.bias
+
+    def fit(self, signals: list[dict], labels, epochs: int = 150, lr: float = 0.5, l2: float = 1e-6):
+        """Full-batch AdaGrad on log loss.
+
+        Classes are left unweighted so outputs stay calibrated probabilities,
+        which is what ``PRESCORE_SKIP_PROBABILITY`` is compared against.
+
+        Per-feature step sizes matter here: most hashed features are rare, and
+        a single global step either crawls on them or diverges on common ones.
+        """
+        y = np.asarray(labels, dtype=np.float64)
+        indices, values, row_ids, n_rows = self._matrix(signals)
+
+        grad_sq = np.zeros(self.dims)
+        bias_grad_sq = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-self._logits(indices, values, row_ids, n_rows)))
+            residual = (p - y) / n_rows
+            grad = np.bincount(indices, weights=residual[row_ids] * values, minlength=self.dims)
+            grad += l2 * self.weights
+            grad_sq += grad * grad
+            self.weights -= lr * grad / (np.sqrt(grad_sq) + 1e-8)
+            bias_grad = residual.sum()
+            bias_grad_sq += bias_grad * bias_grad
+            self.bias -= lr * bias_grad / (np.sqrt(bias_grad_sq) + 1e-8)
+        return self
+
+    def predict_proba(self, signals: list[dict]):
+        """Probability that each signal would score as a lead."""
+        if not signals:
+            return np.zeros(0)
+        logits = self._logits(*self._matrix(signals))
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+class Gate:
+    """Decides which signals skip Haiku."""
+
+    def __init__(self, model: PreScorer, skip_probability: float, audit_rate: float):
+        self.model = model
+        self.skip_probability = skip_probability
+        self.audit_rate = audit_rate
+        self.skipped = 0
+        self.audited = 0
+        self._rng = random.Random()
+
+    def partition(self, signals: list[dict]) -> tuple[list[dict], list[tuple[dict, float]]]:
+        """Split into (signals for Haiku, [(skipped signal, lead probability)])."""
+        to_score, skipped = [], []
+        for signal, p in zip(signals, self.model.predict_proba(signals)):
+            if p >= self.skip_probability:
+                to_score.append(signal)
+            elif self._rng.random() < self.audit_rate:
+                self.audited += 1
+                to_score.append(signal)
+            else:
+                skipped.append((signal, float(p)))
+        self.skipped += len(skipped)
+        return to_score, skipped
+
+
+def skipped_scores(probability: float) -> dict:
+    """Scores stored for a signal the gate skipped."""
+    return {
+        "pain_intensity": 0, "urgency": 0, "commercial_context": 0,
+        "decision_maker": 0, "anthromind_fit": 0, "total_score": 0,
+        "category": "",
+        "reasoning": f"Skipped by pre-scorer (lead probability {probability:.3f})",
+        "suggested_hook": "",
+    }
+
+
+def _history_signals() -> tuple[list[dict], list[int]]:
+    signals, labels = [], []
+    for row in storage.get_scored_history():
+        signal = json.loads(row["extra_json"] or "{}")
+        signal.update(source=row["source"], title=row["title"] or "", text=row["text"] or "")
+        signals.append(signal)
+        labels.append(int(row["total_score"] >= lead_threshold(row["source"])))
+    return signals, labels
+
+
+def evaluate(model: PreScorer, signals: list[dict], labels: list[int], skip_probability: float) -> dict:
+    """Lead recall and skip rate of the gate on a labelled slice."""
+    skips = model.predict_proba(signals) < skip_probability
+    y = np.asarray(labels, dtype=bool)
+    leads = int(y.sum())
+    return {
+        "signals": len(labels),
+        "leads": leads,
+        "recall": float((~skips & y).sum() / leads) if leads else 1.0,
+        "skip_rate": float(skips.mean()) if len(labels) else 0.0,
+    }
+
+
+def train_gate() -> Gate | None:
+    """Train on scored history; return a Gate only if it passes the held-out check."""
+    if not config.PRESCORE_ENABLED:
+        return None
+    if np is None:
+        print("  [prescorer] numpy not installed — pre-scorer disabled")
+        return None
+
+    signals, labels = _history_signals()
+    if len(signals) < config.PRESCORE_MIN_SIGNALS:
+        print(f"  [prescorer] {len(signals)} scored signals in history "
+              f"(need {config.PRESCORE_MIN_SIGNALS}) — pre-scorer disabled")
+        return None
+
+    split = int(len(signals) * (1 - config.PRESCORE_HOLDOUT_FRACTION))
+    if sum(labels[:split]) < config.PRESCORE_MIN_LEADS or not sum(labels[split:]):
+        print("  [prescorer] Too few leads in history to train or validate — pre-scorer disabled")
+        return None
+
+    model = PreScorer().fit(signals[:split], labels[:split])
+    report = evaluate(model, signals[split:], labels[split:], config.PRESCORE_SKIP_PROBABILITY)
+    print(
+        f"  [prescorer] Trained on {split} signals; held-out {report['signals']} "
+        f"({report['leads']} leads): recall {report['recall']:.1%}, "
+        f"would skip {report['skip_rate']:.1%}"
+    )
+    if report["recall"] < config.PRESCORE_MIN_RECALL:
+        print(f"  [prescorer] Recall below {config.PRESCORE_MIN_RECALL:.0%} — pre-scorer disabled")
+        return None
+    return Gate(model, config.PRESCORE_SKIP_PROBABILITY, config.PRESCORE_AUDIT_RATE)
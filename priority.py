@@ -0,0 +1,57 @@
+"""Cheap scoring priority, so a noisy day spends the budget on likely leads.
+
+A signal's priority is the sum of:
+
+- its source weight (``config.SOURCE_PRIORITY``)
+- a weight per keyword cluster it hits (``config.CLUSTER_PRIORITY``):
+  buying intent ("need", "budget") outranks general frustration
+- log-scaled community score (Reddit upvotes)
+- a recency bonus that halves every ``RECENCY_HALF_LIFE_HOURS``
+
+No network or model calls, so it can run on every signal as it is queued.
+"""
+
+import math
+import time
+from datetime import datetime
+
+import config
+from keywords import match_keywords
+
+
+RECENCY_HALF_LIFE_HOURS = 24
+RECENCY_WEIGHT = 1.0
+COMMUNITY_SCORE_WEIGHT = 0.5
+# Signals carried over from an earlier run go ahead of same-priority new ones
+CARRYOVER_BONUS = 1.0
+
+
+def _created_timestamp(signal: dict) -> float | None:
+    """Epoch seconds the signal was posted, from whichever field its source sets."""
+    if signal.get("created_utc"):
+        return float(signal["created_utc"])
+    created = signal.get("created_at")
+    if not created or created == "None":
+        return None
+    try:
+        return datetime.fromisoformat(str(created).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def priority(signal: dict, now: float | None = None) -> float:
+    """Higher scores first."""
+    value = config.SOURCE_PRIORITY.get(signal.get("source", ""), 1.0)
+
+    match = match_keywords(f"{signal.get('title', '')}\n{signal.get('text', '')}")
+    value += sum(config.CLUSTER_PRIORITY.get(cluster, 0.0) for cluster in match.clusters)
+
+    score = signal.get("score")
+    if isinstance(score, (int, float)) and score > 0:
+        value += COMMUNITY_SCORE_WEIGHT * math.log1p(score)
+
+    created = _created_timestamp(signal)
+    if created is not None:
+        age_hours = max(0.0, ((now or time.time()) - created) / 3600)
+        value += RECENCY_WEIGHT * 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    return value
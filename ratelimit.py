@@ -0,0 +1,123 @@
+"""Token-bucket rate limiting and a circuit breaker, shared across worker threads."""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute`` / 60 per second.
+
+    A ``per_minute`` of 0 disables limiting. ``pause()`` empties the bucket and
+    blocks every caller until the pause expires, which is how 429 backoff is
+    shared between workers.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Block until ``amount`` tokens are available, then take them."""
+        if self.per_minute <= 0:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = max(self._paused_until - now, (amount - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for ``seconds`` and drain the bucket."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets acquired together."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: float = 0.0):
+        """Block until one request and ``tokens`` tokens fit in the budget."""
+        self.requests.acquire(1)
+        if tokens:
+            self.tokens.acquire(tokens)
+
+    def backoff(self, seconds: float):
+        """Pause every caller, e.g. after the API returned a 429."""
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calls to a failing service after ``threshold`` consecutive failures.
+
+    Once open, ``check()`` raises ``CircuitOpenError`` for ``cooldown``
+    seconds. After that a single trial call is let through (half-open):
+    success closes the breaker, failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, threshold: int, cooldown: float, name: str = "breaker"):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.name = name
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at >= self.cooldown and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(f"{self.name} open after {self.threshold} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"  [{self.name}] Trial call succeeded — closing circuit")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self._opened_at is None and self._failures >= self.threshold > 0):
+                self._opened_at = time.monotonic()
+                print(f"  [{self.name}] {self._failures} consecutive failures — "
+                      f"pausing calls for {self.cooldown:.0f}s")
@@ -1,16 +1,81 @@
 """Claude Haiku multi-dimensional intent scoring for data-deal signals."""
 
+import hashlib
 import json
-from anthropic import Anthropic
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from anthropic import Anthropic, APIConnectionError, APIStatusError, RateLimitError
 import config
+import storage
+from compaction import compact
+from ratelimit import CircuitBreaker, CircuitOpenError
 
 client = None
+_client_lock = threading.Lock()
+
+# Shared by every scoring worker: after repeated connection/5xx failures,
+# calls stop for a cooldown instead of each one waiting out its own timeout.
+breaker = CircuitBreaker(
+    config.SCORING_BREAKER_THRESHOLD, config.SCORING_BREAKER_COOLDOWN_SECONDS, name="scoring"
+)
+
+# Bump whenever SCORING_PROMPT or the user-message format changes, so cached
+# scores from the old prompt are not reused.
+PROMPT_VERSION = "2"
+
+# Tags this process's rows in the scoring_calls ledger
+RUN_ID = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+# Per-process counters, reported in the run summary
+_stats = {"api_calls": 0, "cache_hits": 0, "tokens": 0}
+_stats_lock = threading.Lock()
+
+
+def count_stat(name: str, n: int = 1):
+    """Increment a scoring counter (thread-safe)."""
+    with _stats_lock:
+        _stats[name] += n
+
+
+def get_stats() -> dict:
+    """Snapshot of scoring counters (API calls, cache hits, tokens) for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+_budget_warned = threading.Event()
 
 
-def _get_client() -> Anthropic:
+def budget_exhausted() -> bool:
+    """True once this run has spent SCORING_RUN_MAX_CALLS or SCORING_RUN_MAX_TOKENS."""
+    stats = get_stats()
+    exhausted = (
+        0 < config.SCORING_RUN_MAX_CALLS <= stats["api_calls"]
+        or 0 < config.SCORING_RUN_MAX_TOKENS <= stats["tokens"]
+    )
+    if exhausted and not _budget_warned.is_set():
+        _budget_warned.set()
+        print(f"  [scoring] Run budget spent ({stats['api_calls']} calls, {stats['tokens']} tokens)"
+              " — deferring remaining signals to the next run")
+    return exhausted
+
+
+def get_client() -> Anthropic:
     global client
-    if client is None:
-        client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
+    with _client_lock:
+        if client is None:
+            # 429s are retried here, behind the shared rate limiter, rather
+            # than inside the SDK where each worker would back off alone.
+            client = Anthropic(
+                api_key=config.ANTHROPIC_API_KEY,
+                max_retries=0,
+                timeout=config.SCORING_TIMEOUT_SECONDS,
+            )
     return client
 
 
@@ -103,16 +168,31 @@ Respond with ONLY valid JSON, no markdown fences:
 }"""
 
 
-def score_signal(signal: dict) -> dict:
-    """Score a signal using Claude Haiku. Returns scores dict."""
-    if not config.ANTHROPIC_API_KEY:
-        print("  [scoring] Skipping — ANTHROPIC_API_KEY not set")
-        return {
-            "pain_intensity": 0, "urgency": 0, "commercial_context": 0,
-            "decision_maker": 0, "anthromind_fit": 0, "total_score": 0,
-            "category": "", "reasoning": "No API key", "suggested_hook": "",
-        }
+def empty_scores(reasoning: str) -> dict:
+    """All-zero scores dict, used when a signal could not be scored."""
+    return {
+        "pain_intensity": 0, "urgency": 0, "commercial_context": 0,
+        "decision_maker": 0, "anthromind_fit": 0, "total_score": 0,
+        "category": "", "reasoning": reasoning, "suggested_hook": "",
+    }
+
 
+def failed_scores(reasoning: str) -> dict:
+    """Empty scores flagged ``failed``: the signal goes to the rescore queue, not the DB."""
+    scores = empty_scores(reasoning)
+    scores["failed"] = True
+    return scores
+
+
+def deferred_scores() -> dict:
+    """Failed-style scores for a signal held back by the run budget (no attempt counted)."""
+    scores = failed_scores("Deferred: run budget spent")
+    scores["deferred"] = True
+    return scores
+
+
+def build_user_message(signal: dict) -> str:
+    """Render a signal as the user turn of the scoring request."""
     source_context = f"Source: {signal.get('source', 'unknown')}"
     if signal.get("subreddit"):
         source_context += f" (r/{signal['subreddit']})"
@@ -121,64 +201,362 @@ def score_signal(signal: dict) -> dict:
     if signal.get("dataset_id"):
         source_context += f" (dataset: {signal['dataset_id']})"
 
-    user_message = f"""{source_context}
+    return f"""{source_context}
 Author: {signal.get('author', 'unknown')}
 Title: {signal.get('title', '')}
 
 Content:
-{signal.get('text', '')[:2000]}"""
+{compact(signal.get('text', ''), source=signal.get('source', ''))}"""
+
 
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(signal: dict) -> str:
+    """Content hash for the score cache.
+
+    Covers the normalized title and compacted content the model sees, plus model and
+    prompt version. Source, author and subreddit/repo are deliberately left
+    out so cross-posts and mirrored issues share one entry.
+    """
+    payload = "\0".join([
+        config.CLAUDE_MODEL,
+        PROMPT_VERSION,
+        _normalize(signal.get("title", "")),
+        _normalize(compact(signal.get("text", ""), source=signal.get("source", ""))),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars/token) for rate-limit accounting."""
+    return len(text) // 4 + 1
+
+
+def clamp_scores(scores: dict) -> dict:
+    """Validate and clamp each dimension, then recompute the total."""
+    scores["pain_intensity"] = max(0, min(25, int(scores.get("pain_intensity", 0))))
+    scores["urgency"] = max(0, min(20, int(scores.get("urgency", 0))))
+    scores["commercial_context"] = max(0, min(20, int(scores.get("commercial_context", 0))))
+    scores["decision_maker"] = max(0, min(15, int(scores.get("decision_maker", 0))))
+    scores["anthromind_fit"] = max(0, min(20, int(scores.get("anthromind_fit", 0))))
+
+    # Recompute total from components
+    scores["total_score"] = (
+        scores["pain_intensity"]
+        + scores["urgency"]
+        + scores["commercial_context"]
+        + scores["decision_maker"]
+        + scores["anthromind_fit"]
+    )
+    return scores
+
+
+def _strip_fences(text: str) -> str:
+    """Strip markdown fences if present."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def parse_scores(text: str) -> dict:
+    """Parse Haiku's JSON reply into a clamped scores dict.
+
+    Raises json.JSONDecodeError if the reply is not valid JSON.
+    """
+    return clamp_scores(json.loads(_strip_fences(text)))
+
+
+def _retry_after(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's hint, else exponential backoff."""
+    response = getattr(error, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
     try:
-        response = _get_client().messages.create(
-            model=config.CLAUDE_MODEL,
-            max_tokens=500,
-            messages=[
-                {"role": "user", "content": user_message},
-            ],
-            system=SCORING_PROMPT,
-        )
+        return max(1.0, float(header))
+    except (TypeError, ValueError):
+        return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+
+def request_params(user_message: str, max_tokens: int = 500) -> dict:
+    """Messages API parameters for one scoring request."""
+    return {
+        "model": config.CLAUDE_MODEL,
+        "max_tokens": max_tokens,
+        "messages": [
+            {"role": "user", "content": user_message},
+        ],
+        # Identical on every call, so mark it cacheable; the cache only
+        # engages once the prompt reaches the model's minimum cacheable length.
+        "system": [
+            {"type": "text", "text": SCORING_PROMPT, "cache_control": {"type": "ephemeral"}},
+        ],
+    }
+
+
+def usage_tokens(usage) -> dict:
+    """Token counts from a Messages API ``usage`` object (missing fields -> 0)."""
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
 
-        text = response.content[0].text.strip()
-        # Strip markdown fences if present
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-
-        scores = json.loads(text)
-
-        # Validate and clamp scores
-        scores["pain_intensity"] = max(0, min(25, int(scores.get("pain_intensity", 0))))
-        scores["urgency"] = max(0, min(20, int(scores.get("urgency", 0))))
-        scores["commercial_context"] = max(0, min(20, int(scores.get("commercial_context", 0))))
-        scores["decision_maker"] = max(0, min(15, int(scores.get("decision_maker", 0))))
-        scores["anthromind_fit"] = max(0, min(20, int(scores.get("anthromind_fit", 0))))
-
-        # Recompute total from components
-        scores["total_score"] = (
-            scores["pain_intensity"]
-            + scores["urgency"]
-            + scores["commercial_context"]
-            + scores["decision_maker"]
-            + scores["anthromind_fit"]
+
+def record_call(mode: str, status: str, usage=None, signals: int = 1, latency_ms: int | None = None):
+    """Log one API call to the ledger; never lets a ledger error fail scoring."""
+    count_stat("tokens", sum(usage_tokens(usage).values()))
+    try:
+        storage.record_scoring_call(
+            RUN_ID, mode, status, usage_tokens(usage), signals=signals, latency_ms=latency_ms
         )
+    except Exception as e:
+        print(f"  [scoring] Could not record call in ledger: {e}")
+
+
+def call_cost(usage: dict, mode: str = "sync") -> float:
+    """Dollar cost of the given token counts at config.HAIKU_PRICE_* rates."""
+    cost = (
+        usage.get("input_tokens", 0) * config.HAIKU_PRICE_INPUT
+        + usage.get("output_tokens", 0) * config.HAIKU_PRICE_OUTPUT
+        + usage.get("cache_read_tokens", 0) * config.HAIKU_PRICE_CACHE_READ
+        + usage.get("cache_write_tokens", 0) * config.HAIKU_PRICE_CACHE_WRITE
+    ) / 1_000_000
+    return cost * config.HAIKU_BATCH_DISCOUNT if mode == "batch" else cost
+
+
+def run_usage(run_id: str | None = None) -> dict:
+    """Ledger rollup for a run (default: this process): calls, tokens, cache hit rate, cost."""
+    totals = {
+        "calls": 0, "failed_calls": 0, "input_tokens": 0, "output_tokens": 0,
+        "cache_read_tokens": 0, "cache_write_tokens": 0, "cost": 0.0,
+    }
+    for row in storage.get_run_usage(run_id or RUN_ID):
+        for field in totals:
+            if field != "cost":
+                totals[field] += row[field] or 0
+        totals["cost"] += call_cost(row, row["mode"])
+    prompt_tokens = totals["input_tokens"] + totals["cache_read_tokens"] + totals["cache_write_tokens"]
+    totals["cache_hit_rate"] = totals["cache_read_tokens"] / prompt_tokens if prompt_tokens else 0.0
+    return totals
+
+
+MULTI_SCORING_INSTRUCTIONS = """Score each of the {count} signals below independently, using the rubric above.
+
+Respond with ONLY a valid JSON array, no markdown fences, holding exactly one object per signal in the order given. Each object has the same fields as the single-signal format plus "id": the signal's number."""
+
+# Output tokens allowed per signal in a packed request
+_MAX_TOKENS_PER_SIGNAL = 400
+
+
+def build_multi_user_message(signals: list[dict]) -> str:
+    """Render several signals as one numbered user turn."""
+    parts = [MULTI_SCORING_INSTRUCTIONS.format(count=len(signals))]
+    for i, signal in enumerate(signals, 1):
+        parts.append(f"### Signal {i}\n{build_user_message(signal)}")
+    return "\n\n".join(parts)
+
+
+def parse_multi_scores(text: str, count: int) -> list[dict | None]:
+    """Parse a packed reply into ``count`` clamped score dicts.
+
+    Items are matched by their ``id`` (falling back to position); any item
+    that is missing or malformed comes back as None. Raises
+    json.JSONDecodeError if the reply is not a JSON array at all.
+    """
+    text = _strip_fences(text)
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise json.JSONDecodeError("Expected a JSON array", text, 0)
+
+    results = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.pop("id", position + 1)) - 1
+            if 0 <= index < count and results[index] is None:
+                results[index] = clamp_scores(item)
+        except (TypeError, ValueError):
+            continue
+    return results
+
+
+def pack_signals(signals: list[dict], token_budget: int | None = None, max_signals: int | None = None):
+    """Group signals into packs of at most ``max_signals`` and ``token_budget`` tokens.
+
+    A signal larger than the budget gets a pack of its own.
+    """
+    token_budget = token_budget or config.SCORING_PACK_TOKEN_BUDGET
+    max_signals = max_signals or config.SCORING_PACK_MAX_SIGNALS
+    pack, pack_tokens = [], 0
+    for signal in signals:
+        tokens = estimate_tokens(build_user_message(signal))
+        if pack and (len(pack) >= max_signals or pack_tokens + tokens > token_budget):
+            yield pack
+            pack, pack_tokens = [], 0
+        pack.append(signal)
+        pack_tokens += tokens
+    if pack:
+        yield pack
+
 
+def _create_message(user_message: str, limiter=None, max_tokens: int = 500, signals: int = 1):
+    """Call Haiku, pacing through ``limiter`` and backing off on 429s.
+
+    Connection errors, timeouts and 5xx responses are retried with
+    exponential backoff and count towards the shared circuit ``breaker``;
+    raises CircuitOpenError while it is open. Every attempt is recorded in
+    the scoring_calls ledger.
+    """
+    for attempt in range(config.SCORING_MAX_RETRIES + 1):
+        breaker.check()
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(SCORING_PROMPT) + estimate_tokens(user_message))
+        start = time.monotonic()
+        try:
+            count_stat("api_calls")
+            response = get_client().messages.create(**request_params(user_message, max_tokens))
+            latency_ms = int((time.monotonic() - start) * 1000)
+            record_call("sync", "ok", response.usage, signals=signals, latency_ms=latency_ms)
+            breaker.record_success()
+            return response
+        except RateLimitError as e:
+            record_call("sync", "rate_limited", signals=signals,
+                        latency_ms=int((time.monotonic() - start) * 1000))
+            breaker.record_success()  # the API is up, just busy
+            if attempt == config.SCORING_MAX_RETRIES:
+                raise
+            delay = _retry_after(e, attempt)
+            print(f"  [scoring] Rate limited (429), backing off {delay:.1f}s")
+            if limiter is not None:
+                limiter.backoff(delay)
+            else:
+                time.sleep(delay)
+        except (APIConnectionError, APIStatusError) as e:
+            record_call("sync", "error", signals=signals,
+                        latency_ms=int((time.monotonic() - start) * 1000))
+            if isinstance(e, APIStatusError) and e.status_code < 500:
+                breaker.record_success()  # a bad request, not an outage
+                raise
+            breaker.record_failure()
+            if attempt == config.SCORING_MAX_RETRIES:
+                raise
+            delay = _retry_after(e, attempt)
+            print(f"  [scoring] {type(e).__name__}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        except Exception:
+            record_call("sync", "error", signals=signals,
+                        latency_ms=int((time.monotonic() - start) * 1000))
+            breaker.record_failure()
+            raise
+
+
+def score_signal(signal: dict, limiter=None) -> dict:
+    """Score a signal using Claude Haiku. Returns scores dict.
+
+    If the signal could not be scored (no API key, API failure after
+    retries, open circuit breaker, unparseable reply) the dict carries
+    ``"failed": True`` — see ``failed_scores``. Once the run budget is
+    spent, signals come back ``"deferred"`` as well.
+
+    Content already scored within ``SCORE_CACHE_TTL_DAYS`` is answered from
+    the score cache without an API call.
+
+    ``limiter`` is an optional ``ratelimit.RateLimiter`` shared between
+    concurrent callers (see ``scoring_engine.ScoringEngine``).
+    """
+    key = cache_key(signal)
+    cached = storage.get_cached_scores(key)
+    if cached is not None:
+        count_stat("cache_hits")
+        return cached
+
+    if not config.ANTHROPIC_API_KEY:
+        print("  [scoring] Skipping — ANTHROPIC_API_KEY not set")
+        return failed_scores("No API key")
+    if budget_exhausted():
+        return deferred_scores()
+
+    user_message = build_user_message(signal)
+
+    try:
+        response = _create_message(user_message, limiter)
+        scores = parse_scores(response.content[0].text)
+        storage.put_cached_scores(key, scores)
         return scores
 
+    except CircuitOpenError as e:
+        return failed_scores(f"Error: {e}")
     except json.JSONDecodeError as e:
         print(f"  [scoring] JSON parse error: {e}")
-        return {
-            "pain_intensity": 0, "urgency": 0, "commercial_context": 0,
-            "decision_maker": 0, "anthromind_fit": 0, "total_score": 0,
-            "category": "", "reasoning": f"Parse error: {e}",
-            "suggested_hook": "",
-        }
+        return failed_scores(f"Parse error: {e}")
     except Exception as e:
         print(f"  [scoring] Error: {e}")
-        return {
-            "pain_intensity": 0, "urgency": 0, "commercial_context": 0,
-            "decision_maker": 0, "anthromind_fit": 0, "total_score": 0,
-            "category": "", "reasoning": f"Error: {e}",
-            "suggested_hook": "",
-        }
+        return failed_scores(f"Error: {e}")
+
+
+def score_signals(signals: list[dict], limiter=None) -> list[dict]:
+    """Score several signals with as few requests as possible.
+
+    Cached content is answered first; the rest is packed into multi-signal
+    requests (see ``pack_signals``). Items a packed reply leaves out or
+    mangles are re-scored one at a time through ``score_signal``. Returns
+    scores in the order of ``signals``.
+    """
+    results = [None] * len(signals)
+    keys = [cache_key(signal) for signal in signals]
+    todo = []
+    for i, (signal, key) in enumerate(zip(signals, keys)):
+        cached = storage.get_cached_scores(key)
+        if cached is not None:
+            count_stat("cache_hits")
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    if todo and not config.ANTHROPIC_API_KEY:
+        print("  [scoring] Skipping — ANTHROPIC_API_KEY not set")
+        for i in todo:
+            results[i] = failed_scores("No API key")
+        return results
+
+    for pack in pack_signals([signals[i] for i in todo]):
+        indices, todo = todo[:len(pack)], todo[len(pack):]
+        if len(pack) == 1:
+            results[indices[0]] = score_signal(pack[0], limiter=limiter)
+            continue
+        if budget_exhausted():
+            for i in indices:
+                results[i] = deferred_scores()
+            continue
+
+        try:
+            response = _create_message(
+                build_multi_user_message(pack), limiter,
+                max_tokens=_MAX_TOKENS_PER_SIGNAL * len(pack), signals=len(pack),
+            )
+            pack_scores = parse_multi_scores(response.content[0].text, len(pack))
+        except CircuitOpenError as e:
+            for i in indices:
+                results[i] = failed_scores(f"Error: {e}")
+            continue
+        except Exception as e:
+            print(f"  [scoring] Packed request for {len(pack)} signals failed: {e}")
+            pack_scores = [None] * len(pack)
+
+        retry = [n for n, scores in enumerate(pack_scores) if scores is None]
+        if retry:
+            print(f"  [scoring] Re-scoring {len(retry)}/{len(pack)} signals individually")
+        for n, scores in enumerate(pack_scores):
+            i = indices[n]
+            if scores is None:
+                results[i] = score_signal(pack[n], limiter=limiter)
+            else:
+                storage.put_cached_scores(keys[i], scores)
+                results[i] = scores
+    return results
@@ -0,0 +1,248 @@
+"""Message Batches scoring backend for the daily cron run.
+
+Per-signal latency doesn't matter in the scheduled run, so all of a run's
+new signals can go out as one Message Batch at half the per-token price.
+``BatchScoringEngine`` has the same submit/completed/drain interface as
+``scoring_engine.ScoringEngine``: it collects signals while sources run and
+submits them once, in ``drain()``, then polls until the batch ends.
+
+Small runs (below ``SCORING_BATCH_MIN_SIZE``) and batch items that error
+or expire fall back to the synchronous ``scoring.score_signal`` path. A
+batch that outlives ``SCORING_BATCH_TIMEOUT_SECONDS`` is cancelled; the
+items it already finished are kept once it ends, and only the rest are
+scored synchronously. Signals beyond the run's token budget (highest
+priority kept) are deferred to the next run.
+
+``FakeBatchClient`` stands in for the Anthropic client offline.
+"""
+
+import itertools
+import json
+import time
+from types import SimpleNamespace
+
+import config
+import priority
+import scoring
+import storage
+
+
+class BatchScoringEngine:
+    """Accumulates signals, then scores them in one Message Batch on drain()."""
+
+    def __init__(self, client=None, poll_interval: float | None = None):
+        self._client = client
+        self._poll_interval = (
+            poll_interval if poll_interval is not None else config.SCORING_BATCH_POLL_SECONDS
+        )
+        self._pending = []
+
+    def submit(self, signal: dict, boost: float = 0.0):
+        """Hold a signal until drain(); ``boost`` is added to its priority."""
+        self._pending.append((priority.priority(signal) + boost, signal))
+
+    @property
+    def outstanding(self) -> int:
+        # Nothing is in flight until drain(), so the pipeline never waits on us
+        return 0
+
+    def completed(self, timeout: float = 0.0):
+        """Batch results only arrive in drain()."""
+        return iter(())
+
+    def drain(self):
+        """Score everything submitted and yield ``(signal, scores)`` pairs."""
+        pending, self._pending = self._pending, []
+        pending.sort(key=lambda entry: entry[0], reverse=True)
+        signals = [signal for _, signal in pending]
+        yield from score_batch(signals, client=self._client, poll_interval=self._poll_interval)
+
+    def close(self):
+        pass
+
+
+# Output tokens assumed per request when budgeting a batch
+_EST_OUTPUT_TOKENS = 300
+
+
+def _within_budget(signals: list[dict]) -> int:
+    """How many of ``signals`` (in order) fit in the run's remaining token budget."""
+    if scoring.budget_exhausted():
+        return 0
+    if config.SCORING_RUN_MAX_TOKENS <= 0:
+        return len(signals)
+    remaining = config.SCORING_RUN_MAX_TOKENS - scoring.get_stats()["tokens"]
+    prompt_tokens = scoring.estimate_tokens(scoring.SCORING_PROMPT) + _EST_OUTPUT_TOKENS
+    for count, signal in enumerate(signals):
+        remaining -= prompt_tokens + scoring.estimate_tokens(scoring.build_user_message(signal))
+        if remaining < 0:
+            return count
+    return len(signals)
+
+
+def _score_sync(signals: list[dict]):
+    for signal in signals:
+        yield signal, scoring.score_signal(signal)
+
+
+def score_batch(signals: list[dict], client=None, poll_interval: float | None = None):
+    """Score ``signals`` through one Message Batch, yielding ``(signal, scores)``.
+
+    Cached content is answered first. ``signals`` should be in priority
+    order: whatever does not fit the run's token budget is deferred from the
+    tail. The remainder falls back to the synchronous path when it is
+    smaller than ``SCORING_BATCH_MIN_SIZE``.
+    """
+    to_score = []
+    for signal in signals:
+        cached = storage.get_cached_scores(scoring.cache_key(signal))
+        if cached is not None:
+            scoring.count_stat("cache_hits")
+            yield signal, cached
+        else:
+            to_score.append(signal)
+
+    fits = _within_budget(to_score)
+    if 0 < fits < len(to_score):
+        print(f"  [scoring_batch] Run budget covers {fits}/{len(to_score)} signals — deferring the rest")
+    for signal in to_score[fits:]:
+        yield signal, scoring.deferred_scores()
+    to_score = to_score[:fits]
+
+    if len(to_score) < config.SCORING_BATCH_MIN_SIZE or (
+        client is None and not config.ANTHROPIC_API_KEY
+    ):
+        yield from _score_sync(to_score)
+        return
+
+    client = client if client is not None else scoring.get_client()
+    if poll_interval is None:
+        poll_interval = config.SCORING_BATCH_POLL_SECONDS
+
+    # custom_id must match ^[a-zA-Z0-9_-]{1,64}$, so index rather than URL
+    by_id = {f"signal-{i}": signal for i, signal in enumerate(to_score)}
+    try:
+        batch = client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": scoring.request_params(scoring.build_user_message(signal))}
+            for custom_id, signal in by_id.items()
+        ])
+    except Exception as e:
+        print(f"  [scoring_batch] Error creating batch, scoring synchronously: {e}")
+        yield from _score_sync(to_score)
+        return
+
+    scoring.count_stat("api_calls")
+    print(f"  [scoring_batch] Submitted batch {batch.id} with {len(by_id)} signals")
+
+    deadline = time.monotonic() + config.SCORING_BATCH_TIMEOUT_SECONDS
+    cancelling = False
+    while batch.processing_status != "ended":
+        if time.monotonic() >= deadline:
+            if cancelling:
+                print(f"  [scoring_batch] Batch {batch.id} did not end after cancelling — giving up on it")
+                break
+            # A cancelled batch still ends with the results it finished
+            print(f"  [scoring_batch] Batch {batch.id} timed out — cancelling")
+            try:
+                client.messages.batches.cancel(batch.id)
+            except Exception as e:
+                print(f"  [scoring_batch] Error cancelling batch: {e}")
+            cancelling = True
+            deadline = time.monotonic() + config.SCORING_BATCH_CANCEL_GRACE_SECONDS
+        time.sleep(poll_interval)
+        try:
+            batch = client.messages.batches.retrieve(batch.id)
+        except Exception as e:
+            print(f"  [scoring_batch] Error polling batch: {e}")
+
+    failed = []
+    if batch.processing_status == "ended":
+        try:
+            for entry in client.messages.batches.results(batch.id):
+                signal = by_id.pop(entry.custom_id, None)
+                if signal is None:
+                    continue
+                if entry.result.type != "succeeded":
+                    scoring.record_call("batch", entry.result.type)
+                    failed.append(signal)
+                    continue
+                scoring.record_call("batch", "ok", getattr(entry.result.message, "usage", None))
+                try:
+                    scores = scoring.parse_scores(entry.result.message.content[0].text)
+                except (json.JSONDecodeError, ValueError, TypeError) as e:
+                    print(f"  [scoring_batch] Parse error for {signal.get('url', '')}: {e}")
+                    failed.append(signal)
+                    continue
+                storage.put_cached_scores(scoring.cache_key(signal), scores)
+                yield signal, scores
+        except Exception as e:
+            # Items not read yet stay in by_id and are re-scored below
+            print(f"  [scoring_batch] Error reading results of batch {batch.id}: {e}")
+
+    # Errored, expired, canceled, missing or unread items get one synchronous try
+    failed.extend(by_id.values())
+    if failed:
+        print(f"  [scoring_batch] Re-scoring {len(failed)} signals synchronously")
+        yield from _score_sync(failed)
+
+
+class FakeBatchClient:
+    """Offline stand-in for ``Anthropic`` exposing ``messages.batches``.
+
+    ``responder(params) -> str`` produces each request's reply text (default:
+    a fixed low score). Batches report ``in_progress`` for ``polls_until_done``
+    retrieves before ending; custom_ids listed in ``errored`` come back as
+    ``errored`` results. Cancelling ends a batch on the next retrieve, with
+    the custom_ids in ``unfinished`` coming back ``canceled``.
+    """
+
+    def __init__(self, responder=None, polls_until_done: int = 1, errored=(), unfinished=()):
+        self.messages = SimpleNamespace(batches=self)
+        self._responder = responder or self._default_responder
+        self._polls_until_done = polls_until_done
+        self._errored = set(errored)
+        self._unfinished = set(unfinished)
+        self._batches = {}
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def _default_responder(params: dict) -> str:
+        return json.dumps({
+            "pain_intensity": 3, "urgency": 2, "commercial_context": 2,
+            "decision_maker": 1, "anthromind_fit": 2, "total_score": 10,
+            "category": "Annotation Quality", "reasoning": "Fake batch reply.",
+            "suggested_hook": "",
+        })
+
+    def _status(self, batch_id: str):
+        batch = self._batches[batch_id]
+        status = "ended" if batch["polls"] >= self._polls_until_done else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    def create(self, requests):
+        batch_id = f"msgbatch_fake_{next(self._ids)}"
+        self._batches[batch_id] = {"requests": list(requests), "polls": 0, "cancelled": False}
+        return self._status(batch_id)
+
+    def retrieve(self, batch_id: str):
+        batch = self._batches[batch_id]
+        batch["polls"] = self._polls_until_done if batch["cancelled"] else batch["polls"] + 1
+        return self._status(batch_id)
+
+    def cancel(self, batch_id: str):
+        self._batches[batch_id]["cancelled"] = True
+        return SimpleNamespace(id=batch_id, processing_status="canceling")
+
+    def results(self, batch_id: str):
+        cancelled = self._batches[batch_id]["cancelled"]
+        for request in self._batches[batch_id]["requests"]:
+            custom_id = request["custom_id"]
+            if cancelled and custom_id in self._unfinished:
+                result = SimpleNamespace(type="canceled")
+            elif custom_id in self._errored:
+                result = SimpleNamespace(type="errored", error={"type": "api_error"})
+            else:
+                text = self._responder(request["params"])
+                message = SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+                result = SimpleNamespace(type="succeeded", message=message)
+            yield SimpleNamespace(custom_id=custom_id, result=result)
@@ -0,0 +1,142 @@
+"""Bounded-concurrency scoring engine — replaces the serial Haiku loop.
+
+Signals are scored on a thread pool. Every worker draws from one shared
+``ratelimit.RateLimiter`` (requests/min + input tokens/min) instead of
+sleeping a fixed interval, and a 429 pauses all workers at once.
+
+Submitted signals wait in a priority heap (see ``priority.py``); each time a
+worker frees up it takes the highest-priority pack (see
+``scoring.pack_signals``), so a tight run budget goes to the likeliest leads.
+Submissions are released to the workers once a pack's worth is buffered, and
+otherwise the next time results are collected. Signals below
+``SCORING_HOLD_BELOW_PRIORITY`` are held back until ``drain()``, so an early
+flood of low-value signals cannot spend the budget before high-value ones
+from slower sources arrive.
+
+Results are handed back to the caller's thread through a queue so that
+persistence and notifications stay single-threaded.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import priority
+import scoring
+from ratelimit import RateLimiter
+
+
+class ScoringEngine:
+    """Submit signals, then collect ``(signal, scores)`` pairs as they finish."""
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ):
+        self.limiter = RateLimiter(
+            requests_per_minute if requests_per_minute is not None else config.SCORING_RPM,
+            tokens_per_minute if tokens_per_minute is not None else config.SCORING_TPM,
+        )
+        self._concurrency = concurrency or config.SCORING_CONCURRENCY
+        self._pool = ThreadPoolExecutor(
+            max_workers=self._concurrency,
+            thread_name_prefix="scoring",
+        )
+        self._results = queue.Queue()
+        # Only touched from the caller's thread
+        self._outstanding = 0
+        self._staged = []
+        self._held = []
+        # (-priority, submission order, signal), shared with the workers
+        self._heap = []
+        self._heap_lock = threading.Lock()
+        self._order = itertools.count()
+
+    def _take_pack(self) -> list[dict]:
+        """Pop the highest-priority pack off the heap."""
+        with self._heap_lock:
+            candidates = [
+                heapq.heappop(self._heap)
+                for _ in range(min(len(self._heap), config.SCORING_PACK_MAX_SIGNALS))
+            ]
+            if not candidates:
+                return []
+            pack = next(scoring.pack_signals([signal for _, _, signal in candidates]))
+            for entry in candidates[len(pack):]:
+                heapq.heappush(self._heap, entry)
+        return pack
+
+    def _score(self):
+        """Worker task: score packs until the heap is empty."""
+        while signals := self._take_pack():
+            try:
+                all_scores = scoring.score_signals(signals, limiter=self.limiter)
+            except Exception as e:
+                print(f"  [scoring] Error: {e}")
+                all_scores = [scoring.failed_scores(f"Error: {e}") for _ in signals]
+            for signal, scores in zip(signals, all_scores):
+                self._results.put((signal, scores))
+
+    def _flush(self):
+        """Release staged signals to the workers."""
+        if not self._staged:
+            return
+        staged, self._staged = self._staged, []
+        with self._heap_lock:
+            for entry in staged:
+                heapq.heappush(self._heap, entry)
+        # Each task keeps taking packs until the heap is empty, so one per
+        # pack (up to the pool size) is enough to keep every worker busy.
+        packs = -(-len(staged) // config.SCORING_PACK_MAX_SIGNALS)
+        for _ in range(min(packs, self._concurrency)):
+            self._pool.submit(self._score)
+
+    def submit(self, signal: dict, boost: float = 0.0):
+        """Queue a signal for scoring; ``boost`` is added to its priority."""
+        self._outstanding += 1
+        value = priority.priority(signal) + boost
+        entry = (-value, next(self._order), signal)
+        if value < config.SCORING_HOLD_BELOW_PRIORITY:
+            self._held.append(entry)
+            return
+        self._staged.append(entry)
+        if len(self._staged) >= config.SCORING_PACK_MAX_SIGNALS:
+            self._flush()
+
+    @property
+    def outstanding(self) -> int:
+        """Signals submitted and in flight, not counting those held until drain()."""
+        return self._outstanding - len(self._held)
+
+    def completed(self, timeout: float = 0.0):
+        """Yield results that are ready now.
+
+        With a ``timeout``, wait up to that long for the first result.
+        """
+        self._flush()
+        while self.outstanding:
+            try:
+                result = self._results.get(timeout=timeout) if timeout else self._results.get_nowait()
+            except queue.Empty:
+                return
+            timeout = 0.0
+            self._outstanding -= 1
+            yield result
+
+    def drain(self):
+        """Yield every remaining result, blocking until all are done."""
+        self._staged.extend(self._held)
+        self._held = []
+        self._flush()
+        while self._outstanding:
+            result = self._results.get()
+            self._outstanding -= 1
+            yield result
+
+    def close(self):
+        self._pool.shutdown(wait=True)
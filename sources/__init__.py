@@ -0,0 +1,24 @@
+"""Signal sources.
+
+Each module exposes ``iter_signals()``, a generator yielding signal dicts as
+they are discovered, and ``fetch_signals() -> list[dict]`` wrapping it.
+
+Sources run on worker threads (see ``monitor.run``). The orchestrator binds a
+cancel event to each worker thread; long-running sources poll ``cancelled()``
+between network calls and return what they have once their deadline passes.
+"""
+
+import threading
+
+_local = threading.local()
+
+
+def bind_cancel_event(event: threading.Event | None):
+    """Attach the orchestrator's cancel event to the current thread."""
+    _local.cancel_event = event
+
+
+def cancelled() -> bool:
+    """True once the source running on this thread has been cancelled."""
+    event = getattr(_local, "cancel_event", None)
+    return event is not None and event.is_set()
@@ -7,6 +7,7 @@ from pathlib import Path
 
 import config
 import storage
+from sources import cancelled
 
 ARXIV_URL_RE = re.compile(r"https?://(?:arxiv\.org/abs/|alphaxiv\.org/abs/)(\d{4}\.\d{4,5})")
 
@@ -143,19 +144,24 @@ def _parse_papers_from_html(html: str) -> list[dict]:
 
 def fetch_signals() -> list[dict]:
     """Read AlphaXiv weekly digest from Gmail and extract paper signals."""
+    return list(iter_signals())
+
+
+def iter_signals():
+    """Yield paper signals from each digest email as it is read."""
     # Check if Gmail credentials are available
     token_path = Path(config.GMAIL_TOKEN_FILE)
     if not config.GMAIL_TOKEN_JSON and not token_path.exists():
         creds_file = Path(config.GMAIL_CREDENTIALS_FILE)
         if not creds_file.exists():
             print("  [alphaxiv_digest] Skipping — Gmail credentials not available")
-            return []
+            return
 
     try:
         service = _get_gmail_service()
     except Exception as e:
         print(f"  [alphaxiv_digest] Error connecting to Gmail: {e}")
-        return []
+        return
 
     try:
         results = service.users().messages().list(
@@ -165,17 +171,19 @@ def fetch_signals() -> list[dict]:
         ).execute()
     except Exception as e:
         print(f"  [alphaxiv_digest] Error searching Gmail: {e}")
-        return []
+        return
 
     messages = results.get("messages", [])
     if not messages:
         print("  [alphaxiv_digest] No recent digest emails found")
-        return []
+        return
 
-    all_papers = []
     seen_ids = set()
+    count = 0
 
     for msg_meta in messages:
+        if cancelled():
+            break
         try:
             msg = service.users().messages().get(
                 userId="me",
@@ -196,24 +204,24 @@ def fetch_signals() -> list[dict]:
             if html:
                 papers = _parse_papers_from_html(html)
 
-        for paper in papers:
-            if paper["arxiv_id"] not in seen_ids:
-                seen_ids.add(paper["arxiv_id"])
-                all_papers.append(paper)
-
-    signals = []
-    for paper in all_papers:
-        paper_url = _normalize_arxiv_url(paper["arxiv_id"])
-        if storage.is_seen(paper_url):
-            continue
-
-        signals.append({
-            "source": "alphaxiv_digest",
-            "title": paper["title"],
-            "text": paper["title"],
-            "author": "",
-            "url": paper_url,
-        })
+        papers = [p for p in papers if p["arxiv_id"] not in seen_ids]
+        seen_ids.update(p["arxiv_id"] for p in papers)
+        unseen = set(storage.filter_unseen(
+            _normalize_arxiv_url(p["arxiv_id"]) for p in papers
+        ))
 
-    print(f"  [alphaxiv_digest] Found {len(signals)} new papers from digest emails")
-    return signals
+        for paper in papers:
+            paper_url = _normalize_arxiv_url(paper["arxiv_id"])
+            if paper_url not in unseen:
+                continue
+
+            count += 1
+            yield {
+                "source": "alphaxiv_digest",
+                "title": paper["title"],
+                "text": paper["title"],
+                "author": "",
+                "url": paper_url,
+            }
+
+    print(f"  [alphaxiv_digest] Found {count} new papers from digest emails")
@@ -43,6 +43,11 @@ def fetch_signals() -> list[dict]:
         return []
 
     signals = []
+    unseen = set(storage.filter_unseen(
+        str(row.get("paper_url", "") or row.get("Paper URL", "")
+            or row.get("url", "") or row.get("URL", ""))
+        for row in rows
+    ))
     for row in rows:
         title = str(row.get("title", "") or row.get("Title", ""))
         abstract = str(
@@ -63,9 +68,10 @@ def fetch_signals() -> list[dict]:
         if not paper_url or not title:
             continue
 
-        # Skip if already processed
-        if storage.is_seen(paper_url):
+        # Skip if already processed (or repeated within the sheet)
+        if paper_url not in unseen:
             continue
+        unseen.discard(paper_url)
 
         signals.append({
             "source": "alphaxiv",
@@ -81,6 +81,11 @@ def _extract_papers_fallback(html: str) -> list[dict]:
 
 def fetch_signals() -> list[dict]:
     """Scrape AlphaXiv trending page for new papers."""
+    return list(iter_signals())
+
+
+def iter_signals():
+    """Yield new papers from the AlphaXiv trending page."""
     url = config.ALPHAXIV_TRENDING_URL
     try:
         resp = requests.get(
@@ -91,7 +96,7 @@ def fetch_signals() -> list[dict]:
         resp.raise_for_status()
     except Exception as e:
         print(f"  [alphaxiv_web] Error fetching {url}: {e}")
-        return []
+        return
 
     html = resp.text
 
@@ -102,9 +107,9 @@ def fetch_signals() -> list[dict]:
 
     if not papers:
         print("  [alphaxiv_web] No papers found on trending page")
-        return []
+        return
 
-    signals = []
+    candidates = []
     for paper in papers:
         arxiv_id = paper.get("arxiv_id", "")
         if not arxiv_id:
@@ -119,9 +124,15 @@ def fetch_signals() -> list[dict]:
         if not arxiv_id:
             continue
 
-        paper_url = _normalize_arxiv_url(arxiv_id)
-        if storage.is_seen(paper_url):
+        candidates.append((arxiv_id, _normalize_arxiv_url(arxiv_id), paper))
+
+    unseen = set(storage.filter_unseen(paper_url for _, paper_url, _ in candidates))
+
+    count = 0
+    for arxiv_id, paper_url, paper in candidates:
+        if paper_url not in unseen:
             continue
+        unseen.discard(paper_url)
 
         title = paper.get("title", f"arXiv:{arxiv_id}")
         abstract = paper.get("abstract", "") or paper.get("summary", "")
@@ -129,13 +140,13 @@ def fetch_signals() -> list[dict]:
         if isinstance(authors, list):
             authors = ", ".join(str(a.get("name", a) if isinstance(a, dict) else a) for a in authors)
 
-        signals.append({
+        count += 1
+        yield {
             "source": "alphaxiv",
             "title": title,
             "text": f"{title}\n\n{abstract}" if abstract else title,
             "author": authors,
             "url": paper_url,
-        })
+        }
 
-    print(f"  [alphaxiv_web] Found {len(signals)} new papers")
-    return signals
+    print(f"  [alphaxiv_web] Found {count} new papers")
@@ -1,16 +1,27 @@
-"""GitHub source — scans issues for data-quality pain signals via REST API."""
+"""GitHub source — scans issues for data-quality pain signals via REST API.
 
+Each search query and priority repo resumes from a cursor in ``source_cursors``.
+"""
+
+import hashlib
+import json
+import re
+import time
 from datetime import datetime, timedelta, timezone
 import requests
+import requests.adapters
 import config
+import storage
+from keywords import matches_keywords
+from sources import cancelled
 
 
 API_URL = "https://api.github.com/search/issues"
-
-
-def _matches_keywords(text: str) -> bool:
-    text_lower = text.lower()
-    return any(kw.lower() in text_lower for kw in config.ALL_KEYWORDS)
+GRAPHQL_URL = "https://api.github.com/graphql"
+CURSOR_SOURCE = "github"
+# Issue body kept per signal (and per cached search result)
+_BODY_CHARS = 3000
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
 
 def _get_headers() -> dict:
@@ -20,8 +31,317 @@ def _get_headers() -> dict:
     }
 
 
-def _lookback_date() -> str:
-    return (datetime.now(timezone.utc) - timedelta(days=config.GITHUB_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+def _lookback_date() -> datetime:
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=config.GITHUB_LOOKBACK_DAYS)
+
+
+def _since(key: str) -> datetime:
+    """Start of a query's window: its cursor less the overlap, or the lookback date."""
+    value = None if config.GITHUB_BACKFILL else storage.get_cursor(CURSOR_SOURCE, key)
+    if value is None:
+        return _lookback_date()
+    since = datetime.strptime(value, _TIME_FORMAT).replace(tzinfo=timezone.utc)
+    return since - timedelta(minutes=config.GITHUB_CURSOR_OVERLAP_MINUTES)
+
+
+class RateLimited(Exception):
+    """GitHub refused a search for rate limiting (403/429)."""
+
+
+class QueryRejected(Exception):
+    """GitHub could not parse a search query (422)."""
+
+
+class GitHubClient:
+    """Pooled keep-alive session, paced on GitHub's rate-limit headers.
+
+    Each response's ``X-RateLimit-Remaining`` / ``X-RateLimit-Reset`` are
+    remembered per resource (search, graphql, core), and later calls to that
+    resource are spread evenly over what is left of the window instead of
+    bursting into a 403. A 403/429 waits for the reset (or ``Retry-After``)
+    and retries once, unless that would take over ``GITHUB_MAX_RATE_WAIT_SECONDS``.
+
+    GETs send the last ``ETag`` seen for the URL as ``If-None-Match``; a 304
+    is served from ``http_cache`` and does not count against the limit.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update(_get_headers())
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        # resource -> (remaining, reset epoch seconds)
+        self._limits = {}
+        self._last_call = {}
+        self.calls = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _resource(url: str) -> str:
+        path = requests.utils.urlparse(url).path
+        if path.startswith("/search/"):
+            return "search"
+        if path == "/graphql":
+            return "graphql"
+        return "core"
+
+    def _pace(self, resource: str):
+        """Sleep so the remaining budget lasts until the window resets."""
+        if resource not in self._limits:
+            return
+        remaining, reset = self._limits[resource]
+        now = time.time()
+        window = max(reset - now, 0.0)
+        if remaining <= 0:
+            wait = window
+        else:
+            wait = window / remaining - (now - self._last_call.get(resource, 0.0))
+        if wait > config.GITHUB_MAX_RATE_WAIT_SECONDS:
+            raise RateLimited()
+        deadline = now + wait
+        while not cancelled() and (left := deadline - time.time()) > 0:
+            time.sleep(min(left, 1.0))
+
+    def _record_limits(self, resource: str, resp: requests.Response):
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            self._limits[resource] = (int(remaining), float(reset))
+        if resp.status_code in (403, 429):
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after is not None:
+                self._limits[resource] = (0, time.time() + float(retry_after))
+            elif remaining is None:
+                # Not a rate limit we can wait out (e.g. abuse detection without a hint)
+                raise RateLimited()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pacer, retrying once after a rate-limit wait."""
+        resource = self._resource(url)
+        for attempt in range(2):
+            self._pace(resource)
+            resp = self.session.request(method, url, timeout=15, **kwargs)
+            self.calls += 1
+            self._last_call[resource] = time.time()
+            self._record_limits(resource, resp)
+            if resp.status_code not in (403, 429):
+                return resp
+        raise RateLimited()
+
+    def get(self, url: str, params: dict | None = None, shrink=None) -> tuple[dict, dict]:
+        """GET JSON; returns (data, parsed Link header).
+
+        ``shrink(data)`` cuts the response down to what the caller reads;
+        only that is cached, since the cache lives in the committed database.
+        """
+        url = requests.Request("GET", url, params=params).prepare().url
+        cached = storage.get_http_cache(url)
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        resp = self.request("GET", url, headers=headers)
+        if resp.status_code == 304 and cached:
+            self.not_modified += 1
+            storage.touch_http_cache(url)
+            data = json.loads(cached["body"])
+            return (shrink(data) if shrink else data), json.loads(cached["links_json"] or "{}")
+        if resp.status_code == 422:
+            raise QueryRejected()
+        resp.raise_for_status()
+        data = resp.json()
+        if shrink:
+            data = shrink(data)
+        if resp.headers.get("ETag"):
+            storage.set_http_cache(url, resp.headers["ETag"], json.dumps(data), resp.links)
+        return data, resp.links
+
+    def graphql(self, query: str, variables: dict | None = None) -> dict:
+        """POST a GraphQL query; returns ``data``, logging any partial errors."""
+        resp = self.request("POST", GRAPHQL_URL, json={"query": query, "variables": variables or {}})
+        resp.raise_for_status()
+        payload = resp.json()
+        for error in payload.get("errors") or []:
+            print(f"  [github] GraphQL error: {error.get('message', error)}")
+        return payload.get("data") or {}
+
+    def close(self):
+        self.session.close()
+
+
+def _search_page(data: dict) -> dict:
+    """A search results page with only the item fields the scan reads."""
+    return {
+        "total_count": data.get("total_count", 0),
+        "items": [
+            {
+                "title": item.get("title", ""),
+                "body": (item.get("body") or "")[:_BODY_CHARS],
+                "html_url": item.get("html_url", ""),
+                "repository_url": item.get("repository_url", ""),
+                "user": {"login": (item.get("user") or {}).get("login", "")},
+                "created_at": item.get("created_at", ""),
+                "updated_at": item.get("updated_at", ""),
+            }
+            for item in data.get("items", [])
+        ],
+    }
+
+
+def _pages(client: GitHubClient, query: str):
+    """Yield (total_count, items) for each page of a search, following Link headers."""
+    data, links = client.get(
+        API_URL, {"q": query, "sort": "created", "per_page": config.GITHUB_PER_PAGE}, shrink=_search_page
+    )
+    while True:
+        yield data.get("total_count", 0), data.get("items", [])
+        next_url = links.get("next", {}).get("url")
+        if not next_url or cancelled():
+            return
+        data, links = client.get(next_url, shrink=_search_page)
+
+
+def search_issues(client: GitHubClient, query: str, since: datetime, until: datetime | None = None):
+    """Yield every issue matching ``query`` with a timestamp from ``since`` on.
+
+    The first request is open-ended (``created:>=since``), so a query whose
+    cursor has not moved has the same URL as last run and can come back 304.
+    Pages follow ``Link`` headers. Windows with more results than search
+    will return are bounded at ``until`` (default now), split in two at
+    whole seconds and searched separately; the halves don't overlap.
+    """
+    field = config.GITHUB_CURSOR_FIELD
+    if until is None:
+        window = f"{field}:>={since.strftime(_TIME_FORMAT)}"
+    else:
+        window = f"{field}:{since.strftime(_TIME_FORMAT)}..{until.strftime(_TIME_FORMAT)}"
+    pages = _pages(client, f"{query} {window}")
+    total, items = next(pages)
+    if total > config.GITHUB_SEARCH_RESULT_CAP:
+        until = until or datetime.now(timezone.utc).replace(microsecond=0)
+        if until - since >= timedelta(seconds=1):
+            pages.close()
+            mid = (since + (until - since) / 2).replace(microsecond=0)
+            print(f"  [github] {total} results over the cap, splitting {window}")
+            yield from search_issues(client, query, since, mid)
+            yield from search_issues(client, query, mid + timedelta(seconds=1), until)
+            return
+    yield from items
+    for _, items in pages:
+        yield from items
+
+
+_ISSUE_FIELDS = "title body url createdAt updatedAt author { login }"
+# Variables carrying each repo's since timestamp in _repo_issues_query
+_SINCE_VAR_RE = re.compile(r"s\d+")
+
+
+def _repo_issues_query(batch: list[tuple[str, str | None]]) -> tuple[str, dict]:
+    """Aliased query reading one page of open issues for each (repo, after) in ``batch``."""
+    order = "UPDATED_AT" if config.GITHUB_CURSOR_FIELD == "updated" else "CREATED_AT"
+    params, fields, variables = [], [], {}
+    for i, (repo, after) in enumerate(batch):
+        owner, name = repo.split("/", 1)
+        params.append(f"$o{i}: String!, $n{i}: String!, $a{i}: String, $s{i}: DateTime")
+        fields.append(
+            f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ issues("
+            f"first: {config.GITHUB_GRAPHQL_PAGE_SIZE}, after: $a{i}, states: OPEN, "
+            f"filterBy: {{since: $s{i}}}, orderBy: {{field: {order}, direction: DESC}}) "
+            f"{{ pageInfo {{ hasNextPage endCursor }} nodes {{ {_ISSUE_FIELDS} }} }} }}"
+        )
+        variables.update({f"o{i}": owner, f"n{i}": name, f"a{i}": after})
+    return f"query({', '.join(params)}) {{ {' '.join(fields)} }}", variables
+
+
+def _node_to_item(node: dict) -> dict:
+    """GraphQL issue node in the shape of a REST search item."""
+    return {
+        "title": node.get("title", ""),
+        "body": node.get("body"),
+        "html_url": node.get("url", ""),
+        "user": {"login": (node.get("author") or {}).get("login", "")},
+        "created_at": node.get("createdAt", ""),
+        "updated_at": node.get("updatedAt", ""),
+    }
+
+
+def graphql_repo_issues(gql, since_by_repo: dict[str, datetime], done: set):
+    """Yield (repo, item) for open issues in many repos, a batch of repos per request.
+
+    ``filterBy.since`` matches on ``updatedAt``, which every issue created
+    since the cursor also satisfies; with ``GITHUB_CURSOR_FIELD=created``
+    issues come newest-created first and a repo stops paging at the first
+    one older than its cursor. Repos read through to their cursor are added
+    to ``done``.
+    """
+    stamp_field = f"{config.GITHUB_CURSOR_FIELD}_at"
+    # repo -> endCursor of the last page read
+    pending = {repo: None for repo in since_by_repo}
+    while pending and not cancelled():
+        batch = list(pending.items())[:config.GITHUB_GRAPHQL_REPOS_PER_QUERY]
+        query, variables = _repo_issues_query(batch)
+        for i, (repo, _) in enumerate(batch):
+            variables[f"s{i}"] = since_by_repo[repo].strftime(_TIME_FORMAT)
+        data = gql.graphql(query, variables)
+        for i, (repo, _) in enumerate(batch):
+            issues = ((data.get(f"r{i}") or {}).get("issues")) if data else None
+            if issues is None:
+                print(f"  [github] GraphQL returned nothing for {repo}, skipping")
+                del pending[repo]
+                continue
+            since = since_by_repo[repo].strftime(_TIME_FORMAT)
+            finished = not issues["pageInfo"]["hasNextPage"]
+            for node in issues["nodes"]:
+                item = _node_to_item(node)
+                if item[stamp_field] < since:
+                    finished = True
+                    break
+                yield repo, item
+            if finished:
+                del pending[repo]
+                done.add(repo)
+            else:
+                pending[repo] = issues["pageInfo"]["endCursor"]
+
+
+class FixtureMiss(KeyError):
+    """A GraphQL request has no recorded response and recording is off."""
+
+
+class RecordedGraphQL:
+    """Offline stand-in for ``GitHubClient.graphql`` backed by a JSON file.
+
+    Responses are keyed by a hash of the query and variables, leaving out
+    the per-repo ``since`` timestamps (``$s0``, ``$s1``, ...): those move
+    with the cursors every run, while the repos and page cursors identify
+    the request. A request not in the file is sent through ``client`` and
+    recorded; without a client (``GITHUB_GRAPHQL_RECORD`` unset) it raises
+    ``FixtureMiss``, so offline runs replay exactly what was recorded and
+    never reach the network.
+    """
+
+    def __init__(self, path: str, client: "GitHubClient | None" = None):
+        self.path = path
+        self.client = client
+        try:
+            with open(path) as f:
+                self._responses = json.load(f)
+        except FileNotFoundError:
+            self._responses = {}
+
+    @staticmethod
+    def _key(query: str, variables: dict) -> str:
+        pinned = {name: value for name, value in variables.items() if not _SINCE_VAR_RE.fullmatch(name)}
+        payload = json.dumps({"query": query, "variables": pinned}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def graphql(self, query: str, variables: dict) -> dict:
+        key = self._key(query, variables)
+        if key not in self._responses:
+            if self.client is None:
+                raise FixtureMiss(f"No recorded GraphQL response for {key} in {self.path}")
+            self._responses[key] = self.client.graphql(query, variables)
+            with open(self.path, "w") as f:
+                json.dump(self._responses, f, indent=1)
+        return self._responses[key]
 
 
 def _make_signal(item: dict, repo_name: str = "") -> dict:
@@ -31,7 +351,7 @@ def _make_signal(item: dict, repo_name: str = "") -> dict:
     return {
         "source": "github",
         "title": item.get("title", ""),
-        "text": (item.get("body") or "")[:3000],
+        "text": (item.get("body") or "")[:_BODY_CHARS],
         "author": item.get("user", {}).get("login", ""),
         "url": item.get("html_url", ""),
         "repo": repo_name,
@@ -42,13 +362,38 @@ def _make_signal(item: dict, repo_name: str = "") -> dict:
 
 def fetch_signals() -> list[dict]:
     """Fetch pain signals from GitHub — broad OR queries + priority repo scans."""
+    return list(iter_signals())
+
+
+def iter_signals():
+    """Yield pain signals from GitHub as each search page comes back."""
     if not config.GITHUB_TOKEN:
         print("  [github] Skipping — GITHUB_TOKEN not set")
-        return []
+        return
+
+    client = GitHubClient()
+    try:
+        yield from _scan(client)
+    finally:
+        client.close()
+        print(f"  [github] {client.calls} API calls, {client.not_modified} unchanged (304)")
 
-    headers = _get_headers()
-    since = _lookback_date()
-    signals = []
+
+def _advance_cursor(key: str, newest: str | None):
+    """Move a query's cursor to the newest issue timestamp it returned, never backwards.
+
+    Tying the cursor to the data rather than the clock means a query with
+    nothing new keeps the same window, and so the same URL and ETag.
+    """
+    current = storage.get_cursor(CURSOR_SOURCE, key)
+    value = max(filter(None, (current, newest)), default=_lookback_date().strftime(_TIME_FORMAT))
+    if value != current:
+        storage.set_cursor(CURSOR_SOURCE, key, value)
+
+
+def _scan(client: GitHubClient):
+    stamp_field = f"{config.GITHUB_CURSOR_FIELD}_at"
+    keyword_count = 0
     seen_urls = set()
 
     # Build repo exclusion suffix once
@@ -56,74 +401,97 @@ def fetch_signals() -> list[dict]:
 
     # --- Phase 1: Broad OR queries (Plan C) ---
     # 5 queries replace the old 14 narrow per-keyword queries.
-    # Keywords are in the query itself so no _matches_keywords() pre-filter needed.
+    # Keywords are in the query itself so no matches_keywords() pre-filter needed.
     for query_terms in config.GITHUB_SEARCH_QUERIES:
-        query = f"({query_terms}) is:issue is:open created:>{since} {exclusions}"
+        if cancelled():
+            break
+        cursor_key = f"search:{query_terms}"
+        query = f"({query_terms}) is:issue is:open {exclusions}"
+        newest = None
         try:
-            resp = requests.get(
-                API_URL,
-                headers=headers,
-                params={"q": query, "sort": "created", "per_page": 25},
-                timeout=15,
-            )
-            if resp.status_code == 403:
-                print("  [github] Rate limited on keyword search, stopping early")
-                break
-            if resp.status_code == 422:
-                print(f"  [github] Query rejected (422): {query_terms[:60]}...")
-                continue
-            resp.raise_for_status()
-            items = resp.json().get("items", [])
-
-            for item in items:
+            for item in search_issues(client, query, _since(cursor_key)):
+                newest = max(newest or "", item.get(stamp_field) or "") or None
                 url = item.get("html_url", "")
                 if url in seen_urls:
                     continue
                 seen_urls.add(url)
                 body = item.get("body") or ""
                 title = item.get("title", "")
-                if not _matches_keywords(f"{title} {body}"):
+                if not matches_keywords(f"{title} {body}"):
                     continue
-                signals.append(_make_signal(item))
+                keyword_count += 1
+                yield _make_signal(item)
+
+            if not cancelled():
+                _advance_cursor(cursor_key, newest)
 
+        except RateLimited:
+            print("  [github] Rate limited on keyword search, stopping early")
+            break
+        except QueryRejected:
+            print(f"  [github] Query rejected (422): {query_terms[:60]}...")
         except Exception as e:
             print(f"  [github] Error on query '{query_terms[:50]}...': {e}")
 
-    print(f"  [github] Keyword queries found {len(signals)} signals")
+    print(f"  [github] Keyword queries found {keyword_count} signals")
 
     # --- Phase 2: Priority repo scans (Plan A + B) ---
-    # No _matches_keywords() pre-filter — pass everything to Claude.
+    # No matches_keywords() pre-filter — pass everything to Claude.
     # Volume is small (~5-20 issues/day per repo). Claude's prompt handles false positives.
     repo_count = 0
-    for repo in config.GITHUB_PRIORITY_REPOS:
-        query = f"repo:{repo} is:issue is:open created:>{since}"
+    done = set()
+    if config.GITHUB_REPO_SCAN == "graphql" and not cancelled():
+        gql = client
+        if config.GITHUB_GRAPHQL_FIXTURE:
+            gql = RecordedGraphQL(config.GITHUB_GRAPHQL_FIXTURE, client if config.GITHUB_GRAPHQL_RECORD else None)
+        since_by_repo = {repo: _since(f"repo:{repo}") for repo in config.GITHUB_PRIORITY_REPOS}
+        newest_by_repo = {}
         try:
-            resp = requests.get(
-                API_URL,
-                headers=headers,
-                params={"q": query, "sort": "created", "per_page": 25},
-                timeout=15,
-            )
-            if resp.status_code == 403:
-                print("  [github] Rate limited on repo scan, stopping early")
-                break
-            if resp.status_code == 422:
-                print(f"  [github] Repo scan rejected (422) for {repo}, skipping")
-                continue
-            resp.raise_for_status()
-            items = resp.json().get("items", [])
+            for repo, item in graphql_repo_issues(gql, since_by_repo, done):
+                newest_by_repo[repo] = max(newest_by_repo.get(repo, ""), item.get(stamp_field) or "")
+                url = item.get("html_url", "")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                repo_count += 1
+                yield _make_signal(item, repo_name=repo)
+        except FixtureMiss:
+            raise
+        except Exception as e:
+            print(f"  [github] GraphQL repo scan failed, falling back to search: {e}")
+        if not cancelled():
+            for repo in done:
+                _advance_cursor(f"repo:{repo}", newest_by_repo.get(repo) or None)
 
-            for item in items:
+    for repo in config.GITHUB_PRIORITY_REPOS:
+        if repo in done:
+            continue
+        if cancelled():
+            print("  [github] Cancelled — returning partial results")
+            break
+        cursor_key = f"repo:{repo}"
+        query = f"repo:{repo} is:issue is:open"
+        newest = None
+        try:
+            for item in search_issues(client, query, _since(cursor_key)):
+                newest = max(newest or "", item.get(stamp_field) or "") or None
                 url = item.get("html_url", "")
                 if url in seen_urls:
                     continue
                 seen_urls.add(url)
-                signals.append(_make_signal(item, repo_name=repo))
                 repo_count += 1
+                yield _make_signal(item, repo_name=repo)
+
+            if not cancelled():
+                _advance_cursor(cursor_key, newest)
 
+        except RateLimited:
+            print("  [github] Rate limited on repo scan, stopping early")
+            break
+        except QueryRejected:
+            print(f"  [github] Repo scan rejected (422) for {repo}, skipping")
         except Exception as e:
             print(f"  [github] Error scanning {repo}: {e}")
 
     print(f"  [github] Priority repos added {repo_count} signals")
-    print(f"  [github] Total: {len(signals)} signals")
-    return signals
+    print(f"  [github] Total: {keyword_count + repo_count} signals")
@@ -1,74 +1,141 @@
-"""Hugging Face source — dataset discussions + hub search for pain signals."""
+"""Hugging Face source — dataset discussions + hub search for pain signals.
+
+Discussion threads already read are remembered in ``hf_discussions``
+(status and last event time), so each run fetches details only for new
+threads, threads whose status changed, and idle threads due a re-read.
+
+Dataset health is probed concurrently and stored per dataset in
+``hf_dataset_health``; a health signal is emitted only when a dataset turns
+unhealthy, with one URL per incident.
+"""
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 
 from huggingface_hub import HfApi, list_datasets
 import requests
+import requests.adapters
 import config
+import storage
+from keywords import matches_keywords
+from sources import cancelled
+
+
+# An idle thread is re-read once it has gone unchecked for this fraction of
+# its idle time (capped by HF_DISCUSSION_RECHECK_MAX_DAYS): busy threads
+# every run, threads quiet for months about monthly.
+_RECHECK_IDLE_FRACTION = 0.25
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _needs_details(disc, cached, now: datetime) -> bool:
+    """Whether a listed thread may have changed since its details were cached.
 
+    The listing has no last-activity time, only status, so a new or
+    re-opened/closed thread is always fetched and others are re-read on a
+    backoff proportional to how long they have been quiet.
+    """
+    if cached is None or cached["status"] != disc.status:
+        return True
+    checked = _parse_time(cached["checked_at"])
+    idle = checked - _parse_time(cached["last_event_at"])
+    interval = min(idle * _RECHECK_IDLE_FRACTION, timedelta(days=config.HF_DISCUSSION_RECHECK_MAX_DAYS))
+    return now - checked >= interval
 
-def _matches_keywords(text: str) -> bool:
-    text_lower = text.lower()
-    return any(kw.lower() in text_lower for kw in config.ALL_KEYWORDS)
 
+def _discussion_details(api: HfApi, dataset_id: str, disc) -> tuple[str, str | None]:
+    """(full text, last event time) of a thread; (title, None) if details fail."""
+    title = disc.title or ""
+    try:
+        detail = api.get_discussion_details(dataset_id, disc.num, repo_type="dataset")
+    except Exception:
+        return title, None
+    # Collect text from all events/comments
+    text_parts = [title]
+    last_event = disc.created_at
+    for event in getattr(detail, "events", []):
+        content = getattr(event, "content", "")
+        if content:
+            text_parts.append(content)
+        created = getattr(event, "created_at", None)
+        if created and (last_event is None or created > last_event):
+            last_event = created
+    return " ".join(text_parts), (last_event or datetime.now(timezone.utc)).isoformat()
 
-def _fetch_dataset_discussions() -> list[dict]:
-    """Scan discussion threads on watched datasets."""
+
+def _iter_dataset_discussions():
+    """Scan new or changed discussion threads on watched datasets.
+
+    Thread lists are fetched per dataset; details (one request per thread)
+    only for threads ``_needs_details`` picks, on a bounded pool.
+    """
     if not config.HF_TOKEN:
-        return []
+        return
 
     api = HfApi(token=config.HF_TOKEN)
-    signals = []
+    now = datetime.now(timezone.utc)
 
+    to_fetch = []
+    listed = 0
     for dataset_id in config.HF_WATCHED_DATASETS:
+        if cancelled():
+            return
         try:
-            discussions = api.get_repo_discussions(
-                dataset_id, repo_type="dataset"
-            )
-            for disc in discussions:
-                title = disc.title or ""
-                # Fetch discussion details for the full text
-                try:
-                    detail = api.get_discussion_details(
-                        dataset_id, disc.num, repo_type="dataset"
-                    )
-                    # Collect text from all events/comments
-                    text_parts = [title]
-                    for event in getattr(detail, "events", []):
-                        content = getattr(event, "content", "")
-                        if content:
-                            text_parts.append(content)
-                    full_text = " ".join(text_parts)
-                except Exception:
-                    full_text = title
-
-                if not _matches_keywords(full_text):
-                    continue
+            cache = storage.get_hf_discussions(dataset_id)
+            for disc in api.get_repo_discussions(dataset_id, repo_type="dataset"):
+                listed += 1
+                if _needs_details(disc, cache.get(disc.num), now):
+                    to_fetch.append((dataset_id, disc))
+        except Exception as e:
+            print(f"  [huggingface] Error scanning {dataset_id}: {e}")
+    print(f"  [huggingface] {listed} discussion threads, {len(to_fetch)} new or due for a re-read")
+
+    pool = ThreadPoolExecutor(max_workers=config.HF_DISCUSSION_CONCURRENCY, thread_name_prefix="hf-discussions")
+    try:
+        futures = {
+            pool.submit(_discussion_details, api, dataset_id, disc): (dataset_id, disc)
+            for dataset_id, disc in to_fetch
+        }
+        for future in as_completed(futures):
+            if cancelled():
+                return
+            dataset_id, disc = futures[future]
+            full_text, last_event_at = future.result()
 
-                signals.append({
+            if matches_keywords(full_text):
+                yield {
                     "source": "huggingface",
-                    "title": title,
+                    "title": disc.title or "",
                     "text": full_text[:3000],
                     "author": getattr(disc, "author", ""),
                     "url": f"https://huggingface.co/datasets/{dataset_id}/discussions/{disc.num}",
                     "dataset_id": dataset_id,
                     "discussion_id": disc.num,
                     "created_at": str(getattr(disc, "created_at", "")),
-                })
+                }
 
-        except Exception as e:
-            print(f"  [huggingface] Error scanning {dataset_id}: {e}")
+            # Cached only once the signal was accepted, and only for threads
+            # whose details were read, so failures retry
+            if last_event_at is not None:
+                storage.save_hf_discussion(dataset_id, disc.num, disc.status, last_event_at, now.isoformat())
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    return signals
 
-
-def _fetch_recent_datasets() -> list[dict]:
+def _iter_recent_datasets():
     """Search for recently created datasets in target domains."""
     if not config.HF_TOKEN:
-        return []
+        return
 
-    signals = []
     search_terms = ["annotation", "RLHF", "preference", "human-labeled", "evaluation"]
 
     for term in search_terms:
+        if cancelled():
+            break
         try:
             datasets = list(list_datasets(
                 search=term,
@@ -85,10 +152,10 @@ def _fetch_recent_datasets() -> list[dict]:
                     card_text = str(getattr(card, "text", ""))
                 full_text = f"{ds.id} {desc} {card_text}"
 
-                if not _matches_keywords(full_text):
+                if not matches_keywords(full_text):
                     continue
 
-                signals.append({
+                yield {
                     "source": "huggingface_dataset",
                     "title": ds.id,
                     "text": (desc or card_text)[:3000],
@@ -96,61 +163,112 @@ def _fetch_recent_datasets() -> list[dict]:
                     "url": f"https://huggingface.co/datasets/{ds.id}",
                     "dataset_id": ds.id,
                     "created_at": str(getattr(ds, "created_at", "")),
-                })
+                }
 
         except Exception as e:
             print(f"  [huggingface] Error searching '{term}': {e}")
 
-    return signals
 
+HEALTH_URL = "https://datasets-server.huggingface.co/is-valid"
 
-def _fetch_dataset_health() -> list[dict]:
-    """Check dataset validity for watched datasets — flag unhealthy ones."""
-    signals = []
 
-    for dataset_id in config.HF_WATCHED_DATASETS:
-        try:
-            resp = requests.get(
-                f"https://datasets-server.huggingface.co/is-valid?dataset={dataset_id}",
-                timeout=10,
-            )
-            if resp.status_code != 200:
+def _is_healthy(status: dict) -> bool:
+    return bool(status.get("preview", True)) and bool(status.get("viewer", True))
+
+
+def _probe(session: requests.Session, dataset_id: str) -> dict | None:
+    """datasets-server ``is-valid`` status for a dataset, or None if it didn't answer."""
+    resp = session.get(HEALTH_URL, params={"dataset": dataset_id}, timeout=10)
+    if resp.status_code != 200:
+        return None
+    return resp.json()
+
+
+def _iter_dataset_health():
+    """Check dataset validity for watched datasets — flag ones that turn unhealthy.
+
+    Probes run concurrently on one pooled session. Each dataset's last state
+    is kept in ``hf_dataset_health``, and a signal is emitted only when a
+    dataset goes from healthy (or unknown) to unhealthy. Its URL carries the
+    incident's start time, so a later incident on the same dataset is not
+    dropped as already seen.
+    """
+    session = requests.Session()
+    if config.HF_TOKEN:
+        session.headers["Authorization"] = f"Bearer {config.HF_TOKEN}"
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=config.HF_HEALTH_CONCURRENCY
+    )
+    session.mount("https://", adapter)
+    pool = ThreadPoolExecutor(max_workers=config.HF_HEALTH_CONCURRENCY, thread_name_prefix="hf-health")
+
+    previous = storage.get_dataset_health()
+    now = datetime.now(timezone.utc).isoformat()
+    incidents = recovered = 0
+    futures = {}
+    try:
+        futures = {pool.submit(_probe, session, dataset_id): dataset_id for dataset_id in config.HF_WATCHED_DATASETS}
+        for future in as_completed(futures):
+            if cancelled():
+                break
+            dataset_id = futures[future]
+            try:
+                status = future.result()
+            except Exception as e:
+                print(f"  [huggingface] Error checking health for {dataset_id}: {e}")
+                continue
+            if status is None:
                 continue
-            data = resp.json()
-            if not data.get("preview", True) or not data.get("viewer", True):
-                signals.append({
+
+            healthy = _is_healthy(status)
+            last = previous.get(dataset_id)
+            changed = last is None or bool(last["healthy"]) != healthy
+            changed_at = now if changed else last["changed_at"]
+            if changed and not healthy:
+                incidents += 1
+                started = datetime.fromisoformat(now).strftime("%Y%m%dT%H%M%SZ")
+                yield {
                     "source": "huggingface_health",
                     "title": f"Dataset health issue: {dataset_id}",
-                    "text": f"Dataset {dataset_id} has health issues: {data}",
+                    "text": f"Dataset {dataset_id} has health issues: {status}",
                     "author": "",
-                    "url": f"https://huggingface.co/datasets/{dataset_id}",
+                    "url": f"https://huggingface.co/datasets/{dataset_id}#health-{started}",
                     "dataset_id": dataset_id,
-                    "created_at": "",
-                })
-        except Exception as e:
-            print(f"  [huggingface] Error checking health for {dataset_id}: {e}")
+                    "created_at": now,
+                }
+            elif changed and last is not None:
+                recovered += 1
+            # Saved once the incident signal (if any) was accepted, so a
+            # cancelled run reports it again next time
+            storage.set_dataset_health(dataset_id, healthy, status, changed_at, now)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        session.close()
 
-    return signals
+    print(f"  [huggingface] Health: {len(futures)} datasets probed, "
+          f"{incidents} newly unhealthy, {recovered} recovered")
 
 
 def fetch_signals() -> list[dict]:
     """Fetch all Hugging Face signals."""
+    return list(iter_signals())
+
+
+def iter_signals():
+    """Yield Hugging Face signals as each check produces them."""
     if not config.HF_TOKEN:
         print("  [huggingface] Skipping — HF_TOKEN not set")
-        return []
-
-    signals = []
-    signals.extend(_fetch_dataset_discussions())
-    signals.extend(_fetch_recent_datasets())
-    signals.extend(_fetch_dataset_health())
+        return
 
     # Deduplicate by URL
     seen = set()
-    unique = []
-    for s in signals:
-        if s["url"] not in seen:
-            seen.add(s["url"])
-            unique.append(s)
-
-    print(f"  [huggingface] Found {len(unique)} keyword-matching signals")
-    return unique
+    for signal in itertools.chain(
+        _iter_dataset_discussions(),
+        _iter_recent_datasets(),
+        _iter_dataset_health(),
+    ):
+        if signal["url"] not in seen:
+            seen.add(signal["url"])
+            yield signal
+
+    print(f"  [huggingface] Found {len(seen)} keyword-matching signals")
@@ -1,14 +1,23 @@
-"""Reddit source — scans subreddits for data-quality pain signals using PRAW."""
+"""Reddit source — scans subreddits for data-quality pain signals using PRAW.
 
+Listings resume from per-subreddit cursors in ``source_cursors``.
+"""
+
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import praw
 import config
+import storage
+from keywords import match_keywords, matches_keywords
+from ratelimit import TokenBucket
+from sources import cancelled
 
+CURSOR_SOURCE = "reddit"
 
-def _matches_keywords(text: str) -> bool:
-    """Fast pre-filter: check if text contains any keyword."""
-    text_lower = text.lower()
-    return any(kw.lower() in text_lower for kw in config.ALL_KEYWORDS)
+# Shared by every search worker; Reddit limits per OAuth client
+_search_bucket = TokenBucket(config.REDDIT_RPM)
 
 
 def _submission_to_signal(submission) -> dict:
@@ -39,61 +48,203 @@ def _comment_to_signal(comment, submission_title: str) -> dict:
     }
 
 
-def fetch_signals() -> list[dict]:
-    """Fetch keyword-matching posts and comments from configured subreddits."""
-    if not config.REDDIT_CLIENT_ID or not config.REDDIT_CLIENT_SECRET:
-        print("  [reddit] Skipping — REDDIT_CLIENT_ID/SECRET not set")
-        return []
-
-    reddit = praw.Reddit(
+def _load_cursor(listing: str, sub_name: str) -> tuple[float, str]:
+    """(created_utc, fullname) of the newest item already scanned in a subreddit listing."""
+    value = storage.get_cursor(CURSOR_SOURCE, f"{listing}:{sub_name.lower()}")
+    if value is None:
+        return time.time() - config.REDDIT_BACKFILL_HOURS * 3600, ""
+    created, _, fullname = value.partition(" ")
+    return float(created), fullname
+
+
+def _save_cursor(listing: str, sub_name: str, created_utc: float, fullname: str):
+    storage.set_cursor(CURSOR_SOURCE, f"{listing}:{sub_name.lower()}", f"{created_utc} {fullname}")
+
+
+def _scan_listing(subreddit, sub_name: str, listing: str, limit: int, to_signal):
+    """Yield signals from one subreddit listing newer than its cursor.
+
+    The cursor only advances once the listing was read through to the old
+    cursor (or ran out), so a cancelled or failed scan re-reads the same
+    range next run. A scan that hits ``limit`` first keeps the old cursor
+    as well: moving it would skip the unread gap for good.
+    """
+    since, since_name = _load_cursor(listing, sub_name)
+    newest = None
+    scanned = 0
+    reached = False
+    # PRAW pages through the listing as needed
+    for item in getattr(subreddit, listing)(limit=limit or None):
+        if cancelled():
+            return
+        if item.fullname == since_name or item.created_utc < since:
+            reached = True
+            break
+        scanned += 1
+        if newest is None:
+            newest = item
+        signal = to_signal(item)
+        if signal is not None:
+            yield signal
+    if cancelled():
+        return
+    kind = "posts" if listing == "new" else listing
+    if reached or not limit or scanned < limit:
+        if newest is not None:
+            _save_cursor(listing, sub_name, newest.created_utc, newest.fullname)
+    else:
+        print(f"  [reddit] r/{sub_name}: {limit} {kind} read without reaching last run's cursor — "
+              f"keeping it so the gap is not marked as read")
+    print(f"  [reddit] r/{sub_name}: {scanned} new {kind} since last run")
+
+
+def _matching_submission(submission) -> dict | None:
+    if not matches_keywords(f"{submission.title} {submission.selftext}"):
+        return None
+    return _submission_to_signal(submission)
+
+
+def _matching_comment(comment) -> dict | None:
+    # Comment listings carry the parent post's title, so no extra request
+    if not matches_keywords(comment.body or ""):
+        return None
+    return _comment_to_signal(comment, comment.link_title)
+
+
+def _make_reddit():
+    return praw.Reddit(
         client_id=config.REDDIT_CLIENT_ID,
         client_secret=config.REDDIT_CLIENT_SECRET,
         user_agent=config.REDDIT_USER_AGENT,
     )
 
-    signals = []
-    cutoff = time.time() - 48 * 3600  # 48 hours ago
-
-    for sub_name in config.SUBREDDITS:
-        try:
-            subreddit = reddit.subreddit(sub_name)
 
-            # Scan new posts
-            for submission in subreddit.new(limit=100):
-                if submission.created_utc < cutoff:
-                    continue
-                full_text = f"{submission.title} {submission.selftext}"
-                if not _matches_keywords(full_text):
+def build_search_queries(keywords: list[str], max_chars: int | None = None) -> list[tuple[str, list[str]]]:
+    """Pack keywords into as few ``"a" OR "b"`` queries as fit in ``max_chars``.
+
+    Returns (query, keywords in it) pairs, in keyword order.
+    """
+    max_chars = max_chars or config.REDDIT_SEARCH_QUERY_MAX_CHARS
+    queries, terms = [], []
+    for keyword in dict.fromkeys(keywords):
+        term = f'"{keyword}"'
+        if terms and len(" OR ".join(terms + [term])) > max_chars:
+            queries.append((" OR ".join(terms), [t[1:-1] for t in terms]))
+            terms = []
+        terms.append(term)
+    if terms:
+        queries.append((" OR ".join(terms), [t[1:-1] for t in terms]))
+    return queries
+
+
+def _search(subreddits: str, query: str, local: threading.local) -> list:
+    """Run one combined search; each worker thread keeps its own PRAW client."""
+    if not hasattr(local, "reddit"):
+        local.reddit = _make_reddit()
+    _search_bucket.acquire()
+    return list(local.reddit.subreddit(subreddits).search(
+        query, sort="new", time_filter="day", limit=config.REDDIT_SEARCH_LIMIT
+    ))
+
+
+def _search_signals(cursors: dict[str, float]) -> list[dict]:
+    """Combined keyword searches across every subreddit, merged by URL.
+
+    ``cursors`` maps lowercased subreddit name to the oldest ``created_utc``
+    still of interest. Each signal carries ``search_keywords``: the searched
+    keywords that occur in its title or body (empty when Reddit matched on
+    a stemmed or fuzzy form).
+    """
+    queries = build_search_queries(config.REDDIT_SEARCH_KEYWORDS)
+    subreddits = "+".join(config.SUBREDDITS)
+    merged = {}
+    local = threading.local()
+    pool = ThreadPoolExecutor(
+        max_workers=config.REDDIT_SEARCH_CONCURRENCY, thread_name_prefix="reddit-search"
+    )
+    try:
+        futures = {pool.submit(_search, subreddits, query, local): (query, kws) for query, kws in queries}
+        for future in as_completed(futures):
+            query, query_keywords = futures[future]
+            if cancelled():
+                print("  [reddit] Cancelled — skipping remaining searches")
+                break
+            try:
+                submissions = future.result()
+            except Exception as e:
+                print(f"  [reddit] Error on search '{query[:50]}...': {e}")
+                continue
+            for submission in submissions:
+                since = cursors.get(str(submission.subreddit).lower())
+                if since is None or submission.created_utc < since:
                     continue
-                signals.append(_submission_to_signal(submission))
-
-                # Scan top-level comments on matching posts
-                submission.comments.replace_more(limit=0)
-                for comment in submission.comments[:20]:
-                    if _matches_keywords(comment.body or ""):
-                        signals.append(
-                            _comment_to_signal(comment, submission.title)
-                        )
-
-            # Also do keyword searches (catches posts where keyword is less obvious)
-            for keyword in config.NEED_KEYWORDS + config.RLHF_KEYWORDS[:3]:
-                for submission in subreddit.search(
-                    keyword, sort="new", time_filter="day", limit=10
-                ):
-                    if submission.created_utc < cutoff:
-                        continue
-                    signals.append(_submission_to_signal(submission))
-
-        except Exception as e:
-            print(f"  [reddit] Error scanning r/{sub_name}: {e}")
-
-    # Deduplicate by URL
+                signal = merged.get(f"https://reddit.com{submission.permalink}")
+                if signal is None:
+                    signal = _submission_to_signal(submission)
+                    signal["search_keywords"] = []
+                    merged[signal["url"]] = signal
+                hits = match_keywords(f"{submission.title} {submission.selftext}").keywords
+                for keyword in query_keywords:
+                    if keyword in hits and keyword not in signal["search_keywords"]:
+                        signal["search_keywords"].append(keyword)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    order = {keyword: i for i, keyword in enumerate(config.REDDIT_SEARCH_KEYWORDS)}
+    for signal in merged.values():
+        signal["search_keywords"].sort(key=order.get)
+
+    print(f"  [reddit] {len(queries)} combined searches over r/{subreddits}: {len(merged)} posts")
+    return list(merged.values())
+
+
+def fetch_signals() -> list[dict]:
+    """Fetch keyword-matching posts and comments from configured subreddits."""
+    return list(iter_signals())
+
+
+def iter_signals():
+    """Yield keyword-matching posts and comments as they are discovered."""
+    if not config.REDDIT_CLIENT_ID or not config.REDDIT_CLIENT_SECRET:
+        print("  [reddit] Skipping — REDDIT_CLIENT_ID/SECRET not set")
+        return
+
+    reddit = _make_reddit()
     seen = set()
-    unique = []
-    for s in signals:
-        if s["url"] not in seen:
-            seen.add(s["url"])
-            unique.append(s)
-
-    print(f"  [reddit] Found {len(unique)} keyword-matching signals")
-    return unique
+    # Oldest created_utc still of interest per subreddit, for the searches
+    cursors = {}
+
+    def unseen(signal: dict) -> bool:
+        # Deduplicate by URL
+        if signal["url"] in seen:
+            return False
+        seen.add(signal["url"])
+        return True
+
+    for sub_name in config.SUBREDDITS:
+        if cancelled():
+            print("  [reddit] Cancelled — returning partial results")
+            break
+        subreddit = reddit.subreddit(sub_name)
+        cursors[sub_name.lower()] = _load_cursor("new", sub_name)[0]
+        # Posts, then every comment in the subreddit (not just on matching posts)
+        for listing, limit, to_signal in (
+            ("new", config.REDDIT_MAX_POSTS_PER_RUN, _matching_submission),
+            ("comments", config.REDDIT_MAX_COMMENTS_PER_RUN, _matching_comment),
+        ):
+            if cancelled():
+                break
+            try:
+                for signal in _scan_listing(subreddit, sub_name, listing, limit, to_signal):
+                    if unseen(signal):
+                        yield signal
+            except Exception as e:
+                print(f"  [reddit] Error scanning r/{sub_name} {listing}: {e}")
+
+    # Also do keyword searches (catches posts where keyword is less obvious)
+    if cursors and not cancelled():
+        for signal in _search_signals(cursors):
+            if unseen(signal):
+                yield signal
+
+    print(f"  [reddit] Found {len(seen)} keyword-matching signals")
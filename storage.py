@@ -1,20 +1,101 @@
-"""SQLite storage for signal dedup and history tracking."""
+"""SQLite storage for signal dedup and history tracking.
+
+Each thread keeps one long-lived connection (WAL journal, NORMAL sync), so
+calls cost a statement rather than a connect + fsync. Writes commit on
+their own unless they run inside ``batch()``, which groups everything on
+the current thread into a single transaction.
+"""
 
 import csv
 import json
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 import config
 
 
+# Bound parameters per IN (...) query; well under SQLite's variable limit
+_IN_CHUNK = 500
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+# Bumped by close(), so every thread reopens rather than reusing a closed connection
+_generation = 0
+
+
 def _get_conn() -> sqlite3.Connection:
-    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(config.DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly by batch().
+        # check_same_thread is off only so close() can tidy up at exit; each
+        # connection is still used by the thread that opened it.
+        conn = sqlite3.connect(
+            config.DB_PATH, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_KB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _local.conn = conn
+        _local.depth = 0
+        with _connections_lock:
+            _local.generation = _generation
+            _connections.append(conn)
     return conn
 
 
+@contextmanager
+def batch():
+    """Run every storage write on this thread inside one transaction.
+
+    Nested ``batch()`` blocks join the outermost transaction. Rolls back if
+    the block raises.
+    """
+    conn = _get_conn()
+    if _local.depth == 0:
+        conn.execute("BEGIN IMMEDIATE")
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.execute("ROLLBACK")
+        raise
+    _local.depth -= 1
+    if _local.depth == 0:
+        conn.execute("COMMIT")
+
+
+def close():
+    """Close every thread's connection and fold the WAL back into signals.db.
+
+    Threads that use storage afterwards get a fresh connection.
+    """
+    global _generation
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conn = None
+
+    if config.DB_PATH.exists():
+        conn = sqlite3.connect(config.DB_PATH)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+
+
 def init_db():
     """Create tables if they don't exist."""
     conn = _get_conn()
@@ -43,82 +124,558 @@ def init_db():
             url TEXT PRIMARY KEY,
             first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+
+        CREATE TABLE IF NOT EXISTS score_cache (
+            key TEXT PRIMARY KEY,
+            scores_json TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_hit TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_score_cache_last_hit ON score_cache (last_hit);
+
+        CREATE TABLE IF NOT EXISTS scoring_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            model TEXT,
+            signals INTEGER DEFAULT 1,
+            status TEXT NOT NULL,
+            input_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            cache_read_tokens INTEGER DEFAULT 0,
+            cache_write_tokens INTEGER DEFAULT 0,
+            latency_ms INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_scoring_calls_run_id ON scoring_calls (run_id);
+
+        -- SimHash of each representative signal, plus its LSH bands
+        -- (see neardup.py)
+        CREATE TABLE IF NOT EXISTS simhashes (
+            url TEXT PRIMARY KEY,
+            hash INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_simhashes_created_at ON simhashes (created_at);
+
+        CREATE TABLE IF NOT EXISTS simhash_bands (
+            band INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            url TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_simhash_bands_lookup ON simhash_bands (band, value);
+
+        -- Per-source high-water marks (e.g. newest created_utc per subreddit)
+        CREATE TABLE IF NOT EXISTS source_cursors (
+            source TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, key)
+        );
+
+        -- Hugging Face discussion threads already read, to skip unchanged ones
+        CREATE TABLE IF NOT EXISTS hf_discussions (
+            dataset_id TEXT NOT NULL,
+            num INTEGER NOT NULL,
+            status TEXT,
+            last_event_at TEXT,
+            checked_at TEXT NOT NULL,
+            PRIMARY KEY (dataset_id, num)
+        );
+
+        -- Last known datasets-server health per watched Hugging Face dataset
+        CREATE TABLE IF NOT EXISTS hf_dataset_health (
+            dataset_id TEXT PRIMARY KEY,
+            healthy INTEGER NOT NULL,
+            status_json TEXT,
+            changed_at TEXT NOT NULL,
+            checked_at TEXT NOT NULL
+        );
+
+        -- Last ETag and body per GET URL, for conditional requests (If-None-Match)
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT NOT NULL,
+            body TEXT NOT NULL,
+            links_json TEXT,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Signals whose scoring failed; retried at the start of the next run
+        CREATE TABLE IF NOT EXISTS pending_rescore (
+            url TEXT PRIMARY KEY,
+            signal_json TEXT NOT NULL,
+            reason TEXT,
+            attempts INTEGER DEFAULT 0,
+            first_failed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_failed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
     """)
-    conn.commit()
-    conn.close()
+
+    # Columns added after the first release
+    _add_column(conn, "signals", "scored_by", "TEXT DEFAULT 'haiku'")
+    _add_column(conn, "signals", "duplicate_of", "TEXT")
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
 
 
 def is_seen(url: str) -> bool:
     """Check if a URL has already been processed."""
-    conn = _get_conn()
-    row = conn.execute("SELECT 1 FROM seen_urls WHERE url = ?", (url,)).fetchone()
-    conn.close()
+    row = _get_conn().execute("SELECT 1 FROM seen_urls WHERE url = ?", (url,)).fetchone()
     return row is not None
 
 
 def mark_seen(url: str):
     """Mark a URL as processed."""
-    conn = _get_conn()
-    conn.execute(
-        "INSERT OR IGNORE INTO seen_urls (url) VALUES (?)", (url,)
-    )
-    conn.commit()
-    conn.close()
+    with batch() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO seen_urls (url) VALUES (?)", (url,)
+        )
+
 
+def filter_unseen(urls) -> list[str]:
+    """Return the URLs not yet in ``seen_urls``, in order, without duplicates.
 
-def save_signal(signal: dict, scores: dict):
-    """Save a scored signal to the database."""
+    Resolves the whole list with a handful of indexed ``IN`` queries instead
+    of one ``is_seen`` call per URL.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
     conn = _get_conn()
+    seen = set()
+    for i in range(0, len(urls), _IN_CHUNK):
+        chunk = urls[i:i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        seen.update(
+            row[0] for row in conn.execute(
+                f"SELECT url FROM seen_urls WHERE url IN ({placeholders})", chunk
+            )
+        )
+    return [url for url in urls if url not in seen]
+
+
+def mark_seen_many(urls):
+    """Mark many URLs as processed in one transaction."""
+    with batch() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO seen_urls (url) VALUES (?)",
+            ((url,) for url in urls if url),
+        )
+
+
+def save_signal(signal: dict, scores: dict, scored_by: str = "haiku", duplicate_of: str | None = None):
+    """Save a scored signal to the database.
+
+    ``scored_by`` records where the scores came from: "haiku", "prescorer"
+    for signals the local pre-scorer skipped, "duplicate" for near-
+    duplicates that copy the scores of the signal at ``duplicate_of``, or
+    "unscored" for signals given up on after failing or being deferred.
+    """
     extra = {k: v for k, v in signal.items()
              if k not in ("source", "url", "title", "text", "author")}
-    conn.execute(
-        """INSERT OR IGNORE INTO signals
-           (source, url, title, text, author, extra_json,
-            category, pain_intensity, urgency, commercial_context,
-            decision_maker, anthromind_fit, total_score, haiku_reasoning)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            signal.get("source", ""),
-            signal.get("url", ""),
-            signal.get("title", ""),
-            signal.get("text", ""),
-            signal.get("author", ""),
-            json.dumps(extra),
-            scores.get("category", ""),
-            scores.get("pain_intensity", 0),
-            scores.get("urgency", 0),
-            scores.get("commercial_context", 0),
-            scores.get("decision_maker", 0),
-            scores.get("anthromind_fit", 0),
-            scores.get("total_score", 0),
-            scores.get("reasoning", ""),
-        ),
-    )
-    conn.commit()
-    conn.close()
+    with batch() as conn:
+        conn.execute(
+            """INSERT OR IGNORE INTO signals
+               (source, url, title, text, author, extra_json,
+                category, pain_intensity, urgency, commercial_context,
+                decision_maker, anthromind_fit, total_score, haiku_reasoning, scored_by,
+                duplicate_of)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                signal.get("source", ""),
+                signal.get("url", ""),
+                signal.get("title", ""),
+                signal.get("text", ""),
+                signal.get("author", ""),
+                json.dumps(extra),
+                scores.get("category", ""),
+                scores.get("pain_intensity", 0),
+                scores.get("urgency", 0),
+                scores.get("commercial_context", 0),
+                scores.get("decision_maker", 0),
+                scores.get("anthromind_fit", 0),
+                scores.get("total_score", 0),
+                scores.get("reasoning", ""),
+                scored_by,
+                duplicate_of,
+            ),
+        )
+
+
+def get_scored_history() -> list[sqlite3.Row]:
+    """Signals Haiku actually scored, oldest first (pre-scorer training data).
+
+    Rows skipped by the pre-scorer or zeroed by a failed call are left out.
+    """
+    return _get_conn().execute(
+        """SELECT source, title, text, extra_json, total_score FROM signals
+           WHERE scored_by = 'haiku'
+             AND haiku_reasoning NOT LIKE 'Error:%'
+             AND haiku_reasoning NOT LIKE 'Parse error:%'
+             AND haiku_reasoning != 'No API key'
+           ORDER BY created_at, id"""
+    ).fetchall()
+
+
+def get_recent_signal_texts(limit: int) -> list[sqlite3.Row]:
+    """(source, text) of the ``limit`` most recently stored signals."""
+    return _get_conn().execute(
+        "SELECT source, text FROM signals ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+
+
+def get_signal_scores(url: str) -> dict | None:
+    """Stored scores for a signal, in the shape scoring.score_signal returns."""
+    row = _get_conn().execute(
+        """SELECT category, pain_intensity, urgency, commercial_context, decision_maker,
+                  anthromind_fit, total_score, haiku_reasoning
+           FROM signals WHERE url = ?""",
+        (url,),
+    ).fetchone()
+    if row is None:
+        return None
+    scores = dict(row)
+    scores["reasoning"] = scores.pop("haiku_reasoning") or ""
+    scores["suggested_hook"] = ""
+    return scores
 
 
 def mark_notified(url: str):
     """Mark a signal as having triggered a Slack notification."""
+    with batch() as conn:
+        conn.execute("UPDATE signals SET notified = 1 WHERE url = ?", (url,))
+
+
+def get_cursor(source: str, key: str) -> str | None:
+    """A source's saved high-water mark for ``key``, or None on the first run."""
+    row = _get_conn().execute(
+        "SELECT value FROM source_cursors WHERE source = ? AND key = ?", (source, key)
+    ).fetchone()
+    return row["value"] if row else None
+
+
+def set_cursor(source: str, key: str, value: str):
+    """Save a source's high-water mark for ``key``."""
+    with batch() as conn:
+        conn.execute(
+            """INSERT INTO source_cursors (source, key, value) VALUES (?, ?, ?)
+               ON CONFLICT (source, key) DO UPDATE SET
+                   value = excluded.value,
+                   updated_at = CURRENT_TIMESTAMP""",
+            (source, key, value),
+        )
+
+
+def get_http_cache(url: str) -> sqlite3.Row | None:
+    """Cached (etag, body, links_json) for a GET URL, or None."""
+    return _get_conn().execute(
+        "SELECT etag, body, links_json FROM http_cache WHERE url = ?", (url,)
+    ).fetchone()
+
+
+def set_http_cache(url: str, etag: str, body: str, links: dict):
+    with batch() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO http_cache (url, etag, body, links_json)
+               VALUES (?, ?, ?, ?)""",
+            (url, etag, body, json.dumps(links)),
+        )
+
+
+def touch_http_cache(url: str):
+    """Mark a cached response as just revalidated (304), so pruning keeps it."""
+    with batch() as conn:
+        conn.execute("UPDATE http_cache SET fetched_at = CURRENT_TIMESTAMP WHERE url = ?", (url,))
+
+
+def prune_http_cache() -> int:
+    """Drop cached responses older than HTTP_CACHE_TTL_DAYS."""
+    with batch() as conn:
+        return conn.execute(
+            "DELETE FROM http_cache WHERE fetched_at < datetime('now', ?)",
+            (f"-{config.HTTP_CACHE_TTL_DAYS} days",),
+        ).rowcount
+
+
+def get_hf_discussions(dataset_id: str) -> dict[int, sqlite3.Row]:
+    """Cached state of a dataset's discussion threads, by thread number."""
+    rows = _get_conn().execute(
+        "SELECT num, status, last_event_at, checked_at FROM hf_discussions WHERE dataset_id = ?",
+        (dataset_id,),
+    ).fetchall()
+    return {row["num"]: row for row in rows}
+
+
+def save_hf_discussion(dataset_id: str, num: int, status: str, last_event_at: str, checked_at: str):
+    with batch() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO hf_discussions
+               (dataset_id, num, status, last_event_at, checked_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (dataset_id, num, status, last_event_at, checked_at),
+        )
+
+
+def get_dataset_health() -> dict[str, sqlite3.Row]:
+    """Last recorded health of every probed dataset, by dataset id."""
+    rows = _get_conn().execute(
+        "SELECT dataset_id, healthy, status_json, changed_at, checked_at FROM hf_dataset_health"
+    ).fetchall()
+    return {row["dataset_id"]: row for row in rows}
+
+
+def set_dataset_health(dataset_id: str, healthy: bool, status: dict, changed_at: str, checked_at: str):
+    with batch() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO hf_dataset_health
+               (dataset_id, healthy, status_json, changed_at, checked_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (dataset_id, int(healthy), json.dumps(status), changed_at, checked_at),
+        )
+
+
+def add_pending_rescore(signal: dict, reason: str, count_attempt: bool = True) -> tuple[int, float]:
+    """Queue a signal for the next run; returns (times it has failed, days since first queued).
+
+    Pass ``count_attempt=False`` for signals that were deferred (e.g. by the
+    run budget) rather than failed.
+    """
+    url = signal.get("url", "")
+    step = 1 if count_attempt else 0
+    with batch() as conn:
+        conn.execute(
+            """INSERT INTO pending_rescore (url, signal_json, reason, attempts) VALUES (?, ?, ?, ?)
+               ON CONFLICT (url) DO UPDATE SET
+                   reason = excluded.reason,
+                   attempts = attempts + excluded.attempts,
+                   last_failed = CURRENT_TIMESTAMP""",
+            (url, json.dumps(signal), reason, step),
+        )
+        row = conn.execute(
+            """SELECT attempts, julianday('now') - julianday(first_failed) AS age
+               FROM pending_rescore WHERE url = ?""",
+            (url,),
+        ).fetchone()
+    return row["attempts"], row["age"]
+
+
+def queue_pending_rescores(signals: list[dict], reason: str):
+    """Queue signals accepted for scoring, so a run that dies first hands them to the next one.
+
+    Signals already queued keep their entry (and attempt count).
+    """
+    with batch() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO pending_rescore (url, signal_json, reason) VALUES (?, ?, ?)",
+            ((s.get("url", ""), json.dumps(s), reason) for s in signals if s.get("url")),
+        )
+
+
+def get_pending_rescores() -> list[dict]:
+    """Signals waiting to be rescored, oldest failure first."""
+    rows = _get_conn().execute(
+        "SELECT signal_json FROM pending_rescore ORDER BY first_failed"
+    ).fetchall()
+    return [json.loads(row["signal_json"]) for row in rows]
+
+
+def remove_pending_rescore(url: str):
+    """Drop a signal from the rescore queue (scored, or given up on)."""
+    with batch() as conn:
+        conn.execute("DELETE FROM pending_rescore WHERE url = ?", (url,))
+
+
+def get_cached_scores(key: str) -> dict | None:
+    """Return cached scores for a content hash, or None if absent or expired."""
     conn = _get_conn()
-    conn.execute("UPDATE signals SET notified = 1 WHERE url = ?", (url,))
-    conn.commit()
-    conn.close()
+    row = conn.execute(
+        "SELECT scores_json FROM score_cache WHERE key = ? AND created_at >= datetime('now', ?)",
+        (key, f"-{config.SCORE_CACHE_TTL_DAYS} days"),
+    ).fetchone()
+    if row is None:
+        return None
+    with batch():
+        conn.execute(
+            "UPDATE score_cache SET last_hit = CURRENT_TIMESTAMP WHERE key = ?", (key,)
+        )
+    return json.loads(row["scores_json"])
 
 
-def is_in_outreach_log(author: str) -> bool:
-    """Check if an author has already been contacted via auto-bdr."""
+def put_cached_scores(key: str, scores: dict):
+    """Cache scores under a content hash (see scoring.cache_key)."""
+    with batch() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO score_cache (key, scores_json)
+               VALUES (?, ?)""",
+            (key, json.dumps(scores)),
+        )
+
+
+def prune_score_cache() -> int:
+    """Evict expired entries, then the least recently hit beyond the size cap."""
+    with batch() as conn:
+        expired = conn.execute(
+            "DELETE FROM score_cache WHERE created_at < datetime('now', ?)",
+            (f"-{config.SCORE_CACHE_TTL_DAYS} days",),
+        ).rowcount
+        overflow = conn.execute(
+            """DELETE FROM score_cache WHERE key IN (
+                   SELECT key FROM score_cache ORDER BY last_hit DESC
+                   LIMIT -1 OFFSET ?
+               )""",
+            (config.SCORE_CACHE_MAX_ENTRIES,),
+        ).rowcount
+    return expired + overflow
+
+
+def record_scoring_call(run_id: str, mode: str, status: str, usage: dict,
+                        signals: int = 1, latency_ms: int | None = None):
+    """Append one Haiku call to the scoring_calls ledger."""
+    with batch() as conn:
+        conn.execute(
+            """INSERT INTO scoring_calls
+               (run_id, mode, model, signals, status, input_tokens, output_tokens,
+                cache_read_tokens, cache_write_tokens, latency_ms)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                run_id, mode, config.CLAUDE_MODEL, signals, status,
+                usage.get("input_tokens", 0),
+                usage.get("output_tokens", 0),
+                usage.get("cache_read_tokens", 0),
+                usage.get("cache_write_tokens", 0),
+                latency_ms,
+            ),
+        )
+
+
+def get_run_usage(run_id: str) -> list[dict]:
+    """Ledger totals for one run, one row per mode ("sync", "batch")."""
+    rows = _get_conn().execute(
+        """SELECT mode,
+                  COUNT(*) AS calls,
+                  SUM(status != 'ok') AS failed_calls,
+                  SUM(signals) AS signals,
+                  SUM(input_tokens) AS input_tokens,
+                  SUM(output_tokens) AS output_tokens,
+                  SUM(cache_read_tokens) AS cache_read_tokens,
+                  SUM(cache_write_tokens) AS cache_write_tokens,
+                  AVG(latency_ms) AS avg_latency_ms
+           FROM scoring_calls WHERE run_id = ? GROUP BY mode""",
+        (run_id,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _signed64(value: int) -> int:
+    """Map an unsigned 64-bit hash onto SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def add_simhash(url: str, simhash: int, bands: list[int]):
+    """Index a representative signal's SimHash under its LSH band values."""
+    with batch() as conn:
+        if conn.execute(
+            "INSERT OR IGNORE INTO simhashes (url, hash) VALUES (?, ?)",
+            (url, _signed64(simhash)),
+        ).rowcount:
+            conn.executemany(
+                "INSERT INTO simhash_bands (band, value, url) VALUES (?, ?, ?)",
+                ((band, value, url) for band, value in enumerate(bands)),
+            )
+
+
+def find_simhash_candidates(bands: list[int]) -> list[tuple[str, int]]:
+    """Indexed (url, simhash) pairs that match at least one of ``bands``."""
+    where = " OR ".join(["(b.band = ? AND b.value = ?)"] * len(bands))
+    rows = _get_conn().execute(
+        f"""SELECT DISTINCT s.url, s.hash FROM simhash_bands b
+            JOIN simhashes s ON s.url = b.url
+            WHERE {where}""",
+        [param for band, value in enumerate(bands) for param in (band, value)],
+    ).fetchall()
+    return [(row["url"], row["hash"] & ((1 << 64) - 1)) for row in rows]
+
+
+def prune_simhashes() -> int:
+    """Drop SimHashes older than NEARDUP_WINDOW_DAYS."""
+    with batch() as conn:
+        pruned = conn.execute(
+            "DELETE FROM simhashes WHERE created_at < datetime('now', ?)",
+            (f"-{config.NEARDUP_WINDOW_DAYS} days",),
+        ).rowcount
+        if pruned:
+            conn.execute("DELETE FROM simhash_bands WHERE url NOT IN (SELECT url FROM simhashes)")
+    return pruned
+
+
+_PROFILE_PREFIX_RE = re.compile(
+    r"^(?:https?://)?(?:www\.|old\.)?"
+    r"(?:reddit\.com/(?:user|u)/|github\.com/|huggingface\.co/)"
+)
+
+# Parsed outreach log, rebuilt whenever the CSV's path or mtime changes
+_outreach_index = {"key": None, "handles": frozenset(), "blob": ""}
+
+
+def _normalize_handle(value: str) -> str:
+    """Reduce a username or profile URL to a bare lowercase handle."""
+    handle = _PROFILE_PREFIX_RE.sub("", value.strip().lower())
+    handle = handle.split("/", 1)[0].split("?", 1)[0]
+    if handle.startswith("u/"):
+        handle = handle[2:]
+    return handle.lstrip("@")
+
+
+def _load_outreach_index() -> dict:
+    """Return the outreach-log index, re-reading the CSV only if it changed."""
     log_path = Path(config.AUTO_BDR_OUTREACH_LOG)
-    if not log_path.exists():
-        return False
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Check if the Reddit/GitHub username appears anywhere in the row
-                for val in row.values():
-                    if val and author.lower() in val.lower():
-                        return True
-    except Exception:
-        pass
-    return False
+        key = (str(log_path), log_path.stat().st_mtime_ns)
+    except OSError:
+        key = (str(log_path), None)
+    if _outreach_index["key"] == key:
+        return _outreach_index
+
+    handles = set()
+    cells = []
+    if key[1] is not None:
+        try:
+            with open(log_path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    for val in row.values():
+                        if not val or not isinstance(val, str):
+                            continue
+                        cells.append(val.lower())
+                        handle = _normalize_handle(val)
+                        if handle:
+                            handles.add(handle)
+        except Exception as e:
+            print(f"  [storage] Error reading outreach log: {e}")
+
+    _outreach_index.update(
+        key=key,
+        handles=frozenset(handles),
+        # NUL never appears in a username, so matches can't span two cells
+        blob="\0".join(cells),
+    )
+    return _outreach_index
+
+
+def is_in_outreach_log(author: str) -> bool:
+    """Check if an author has already been contacted via auto-bdr.
+
+    ``OUTREACH_MATCH_MODE=exact`` compares normalized handles with an O(1)
+    set lookup; the default ``substring`` mode keeps the historical
+    behaviour of matching the author anywhere in any cell.
+    """
+    if not author:
+        return False
+    index = _load_outreach_index()
+    if config.OUTREACH_MATCH_MODE == "exact":
+        return _normalize_handle(author) in index["handles"]
+    return author.lower() in index["blob"]
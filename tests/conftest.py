@@ -0,0 +1,28 @@
+"""Shared test setup: import the flat top-level modules and isolate the database."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+import storage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Never reach the real APIs, whatever is in .env."""
+    for name in ("ANTHROPIC_API_KEY", "GITHUB_TOKEN", "HF_TOKEN", "SLACK_WEBHOOK_URL"):
+        monkeypatch.setattr(config, name, "")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database for one test."""
+    monkeypatch.setattr(config, "DB_PATH", tmp_path / "signals.db")
+    storage.close()
+    storage.init_db()
+    yield
+    storage.close()
@@ -0,0 +1,74 @@
+import compaction
+import scoring
+import storage
+from compaction import compact
+
+ISSUE = """### Describe the bug
+Our labeling vendor returns noisy annotations and we need a better pipeline.
+
+```python
+import torch
+model.train()
+```
+
+Traceback (most recent call last):
+  File "train.py", line 10, in <module>
+    main()
+ValueError: labels contain NaN
+
+> I see the same thing
+> on my side
+
+### System Info
+- transformers 4.40
+- torch 2.3
+
+### Checklist
+- [x] I searched existing issues
+"""
+
+
+def test_github_issue_template_is_compacted():
+    out = compact(ISSUE, source="github")
+
+    assert "Describe the bug:" in out
+    assert "Our labeling vendor returns noisy annotations" in out
+    assert "[code: 2 lines]" in out
+    assert "[log: 4 lines] ValueError: labels contain NaN" in out
+    assert "[quoted text]" in out
+    assert "transformers 4.40" not in out
+    assert "I searched existing issues" not in out
+
+
+def test_sections_are_kept_outside_github():
+    out = compact(ISSUE, source="reddit")
+    assert "transformers 4.40" in out
+    assert "I searched existing issues" in out
+
+
+def test_bold_heading_never_drops_a_section():
+    post = (
+        "**Environment**\n"
+        "We run a 20-person annotation team and are looking to buy labeling services.\n"
+    )
+    for source in ("github", "reddit"):
+        out = compact(post, source=source)
+        assert "Environment:" in out
+        assert "looking to buy labeling services" in out
+
+
+def test_truncates_on_a_sentence_boundary():
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+    out = compact(text, max_tokens=50)
+    assert out.endswith("here. [...]")
+    assert len(out) <= 50 * compaction._CHARS_PER_TOKEN + len(" [...]")
+
+
+def test_report_reads_recent_signals(db, capsys):
+    storage.save_signal(
+        {"source": "github", "title": "t", "text": ISSUE, "url": "https://github.com/o/r/issues/1"},
+        scoring.empty_scores(""),
+    )
+    compaction._report()
+    assert "github" in capsys.readouterr().out
+
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import config
+import storage
+from sources import github
+
+URL = "https://api.github.com/search/issues?q=label"
+
+
+class FakeSession:
+    """Answers every GET with 304 once an ETag is sent."""
+
+    def request(self, method, url, timeout=None, headers=None, **kwargs):
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return SimpleNamespace(status_code=304, headers={}, links={})
+        return SimpleNamespace(
+            status_code=200, headers={"ETag": '"v1"'}, links={}, text='{"total_count": 1, "items": []}',
+            json=lambda: {"total_count": 1, "items": []}, raise_for_status=lambda: None,
+        )
+
+    def close(self):
+        pass
+
+
+def test_not_modified_refreshes_the_cache_entry(db, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_CACHE_TTL_DAYS", 7)
+    client = github.GitHubClient()
+    client.session = FakeSession()
+    monkeypatch.setattr(client, "_pace", lambda resource: None)
+    monkeypatch.setattr(client, "_record_limits", lambda resource, resp: None)
+
+    assert client.get(URL) == ({"total_count": 1, "items": []}, {})
+    with storage.batch() as conn:
+        conn.execute("UPDATE http_cache SET fetched_at = datetime('now', '-30 days')")
+
+    assert client.get(URL) == ({"total_count": 1, "items": []}, {})
+    assert client.not_modified == 1
+    assert storage.prune_http_cache() == 0
+    assert storage.get_http_cache(URL)["etag"] == '"v1"'
+
+
+class FullItemSession(FakeSession):
+    """A 200 search page with the fields GitHub really sends."""
+
+    def request(self, method, url, timeout=None, headers=None, **kwargs):
+        item = {
+            "title": "Noisy labels", "body": "x" * 10000, "html_url": "https://github.com/o/r/issues/1",
+            "repository_url": "https://api.github.com/repos/o/r", "created_at": "2026-01-01T00:00:00Z",
+            "updated_at": "2026-01-02T00:00:00Z", "reactions": {"+1": 3}, "labels": [{"name": "bug"}],
+            "user": {"login": "someone", "avatar_url": "https://avatars/1", "type": "User"},
+        }
+        page = {"total_count": 1, "incomplete_results": False, "items": [item]}
+        return SimpleNamespace(status_code=200, headers={"ETag": '"v2"'}, links={},
+                               json=lambda: page, raise_for_status=lambda: None)
+
+
+def test_search_pages_are_cached_without_unused_fields(db, monkeypatch):
+    monkeypatch.setattr(config, "GITHUB_PER_PAGE", 100)
+    client = github.GitHubClient()
+    client.session = FullItemSession()
+    monkeypatch.setattr(client, "_pace", lambda resource: None)
+    monkeypatch.setattr(client, "_record_limits", lambda resource, resp: None)
+
+    (total, items), = list(github._pages(client, "noisy labels"))
+
+    assert total == 1 and items[0]["user"] == {"login": "someone"}
+    cached = storage.get_http_cache(github.API_URL + "?q=noisy+labels&sort=created&per_page=100")
+    assert '"reactions"' not in cached["body"] and '"avatar_url"' not in cached["body"]
+    assert len(cached["body"]) < 3500
+    assert github._make_signal(items[0])["repo"] == "o/r"
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+import config
+import storage
+from sources import github
+
+FIXTURE = Path(__file__).parent / "fixtures" / "github_graphql.json"
+REPOS = ["org/paged", "org/fresh", "org/missing"]
+SINCE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def graphql_config(monkeypatch):
+    # The shape the fixture was recorded with
+    monkeypatch.setattr(config, "GITHUB_GRAPHQL_PAGE_SIZE", 2)
+    monkeypatch.setattr(config, "GITHUB_GRAPHQL_REPOS_PER_QUERY", 2)
+    monkeypatch.setattr(config, "GITHUB_CURSOR_FIELD", "created")
+
+
+def _replay():
+    return github.RecordedGraphQL(str(FIXTURE))
+
+
+def test_pages_each_repo_until_an_older_issue():
+    done = set()
+    items = list(github.graphql_repo_issues(_replay(), {repo: SINCE for repo in REPOS}, done))
+
+    urls = [item["html_url"] for _, item in items]
+    # org/paged follows endCursor to a second page and stops at issue 1 (older than since)
+    assert urls == [
+        "https://github.com/org/paged/issues/5",
+        "https://github.com/org/paged/issues/4",
+        "https://github.com/org/fresh/issues/7",
+        "https://github.com/org/paged/issues/3",
+    ]
+    # A repo GraphQL returned null for is not done, so it falls back to search
+    assert done == {"org/paged", "org/fresh"}
+
+
+def test_replay_ignores_since_values():
+    query, variables = github._repo_issues_query([("org/paged", None), ("org/fresh", None)])
+    later = dict(variables, s0="2026-02-01T00:00:00Z", s1="2026-03-01T00:00:00Z")
+    assert github.RecordedGraphQL._key(query, variables) == github.RecordedGraphQL._key(query, later)
+    assert _replay().graphql(query, later)["r1"]["issues"]["nodes"]
+
+
+def test_miss_without_recording_raises():
+    query, variables = github._repo_issues_query([("org/unrecorded", None)])
+    with pytest.raises(github.FixtureMiss):
+        _replay().graphql(query, variables)
+
+
+class SearchOnlyClient:
+    """GitHubClient stand-in answering repo searches; GraphQL must come from the fixture."""
+
+    def __init__(self):
+        self.queries = []
+
+    def get(self, url, params=None, shrink=None):
+        self.queries.append(params["q"])
+        item = {
+            "title": "Search hit", "body": "", "html_url": "https://github.com/org/missing/issues/2",
+            "user": {"login": "someone"}, "created_at": "2026-01-06T00:00:00Z",
+        }
+        return {"total_count": 1, "items": [item]}, {}
+
+    def graphql(self, query, variables=None):
+        raise AssertionError("network GraphQL call in replay mode")
+
+
+def test_scan_falls_back_to_search_for_null_repos(db, monkeypatch):
+    monkeypatch.setattr(config, "GITHUB_SEARCH_QUERIES", [])
+    monkeypatch.setattr(config, "GITHUB_PRIORITY_REPOS", REPOS)
+    monkeypatch.setattr(config, "GITHUB_REPO_SCAN", "graphql")
+    monkeypatch.setattr(config, "GITHUB_GRAPHQL_FIXTURE", str(FIXTURE))
+    monkeypatch.setattr(config, "GITHUB_GRAPHQL_RECORD", False)
+    monkeypatch.setattr(github, "_since", lambda key: SINCE)
+    client = SearchOnlyClient()
+
+    signals = list(github._scan(client))
+
+    assert [q.split()[0] for q in client.queries] == ["repo:org/missing"]
+    assert signals[-1]["url"] == "https://github.com/org/missing/issues/2"
+    assert len(signals) == 5
+    assert storage.get_cursor(github.CURSOR_SOURCE, "repo:org/paged") == "2026-01-05T00:00:00Z"
+    assert storage.get_cursor(github.CURSOR_SOURCE, "repo:org/fresh") == "2026-01-02T00:00:00Z"
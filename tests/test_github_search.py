@@ -0,0 +1,84 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import config
+from sources import github
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+_WINDOW_RE = re.compile(r"created:(\S+)\.\.(\S+)$")
+
+
+@pytest.fixture(autouse=True)
+def search_config(monkeypatch):
+    monkeypatch.setattr(config, "GITHUB_CURSOR_FIELD", "created")
+    monkeypatch.setattr(config, "GITHUB_SEARCH_RESULT_CAP", 2)
+
+
+def _parse(stamp):
+    return datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class WindowedSearch:
+    """Reports ``total`` results for windows wider than ``max_seconds``, one item otherwise."""
+
+    def __init__(self, max_seconds, total=5):
+        self.max_seconds = max_seconds
+        self.total = total
+        self.windows = []
+
+    def get(self, url, params=None, shrink=None):
+        start, end = map(_parse, _WINDOW_RE.search(params["q"]).groups())
+        self.windows.append((start, end))
+        wide = (end - start).total_seconds() > self.max_seconds
+        item = {"window": (start, end)}
+        return {"total_count": self.total if wide else 1, "items": [item]}, {}
+
+
+def test_windows_over_the_cap_split_without_overlap():
+    client = WindowedSearch(max_seconds=3)
+    until = T0 + timedelta(seconds=10)
+
+    items = list(github.search_issues(client, "labels", T0, until))
+
+    assert client.windows[0] == (T0, until)
+    leaves = [item["window"] for item in items]
+    assert leaves[0][0] == T0 and leaves[-1][1] == until
+    for (_, end), (start, _) in zip(leaves, leaves[1:]):
+        assert start == end + timedelta(seconds=1)
+    assert all((end - start).total_seconds() <= 3 for start, end in leaves)
+    # The first split is since..mid / mid+1s..until
+    assert client.windows[1] == (T0, T0 + timedelta(seconds=5))
+    assert (T0 + timedelta(seconds=6), until) in client.windows
+
+
+def test_one_second_windows_stop_recursing():
+    client = WindowedSearch(max_seconds=-1)  # every window reports too many results
+
+    items = list(github.search_issues(client, "labels", T0, T0 + timedelta(seconds=1)))
+
+    assert client.windows == [(T0, T0 + timedelta(seconds=1)), (T0, T0), (T0 + timedelta(seconds=1),) * 2]
+    assert len(items) == 2
+
+
+class PagedSearch:
+    """Three pages chained through Link rel="next", within the result cap."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, params=None, shrink=None):
+        self.urls.append(url)
+        page = 1 if url == github.API_URL else int(url.rsplit("=", 1)[1])
+        links = {"next": {"url": f"{github.API_URL}?page={page + 1}"}} if page < 3 else {}
+        return {"total_count": 2, "items": [{"html_url": f"issue-{page}"}]}, links
+
+
+def test_pages_are_followed_through_link_next():
+    client = PagedSearch()
+
+    items = list(github.search_issues(client, "labels", T0))
+
+    assert [item["html_url"] for item in items] == ["issue-1", "issue-2", "issue-3"]
+    assert client.urls[1:] == [f"{github.API_URL}?page=2", f"{github.API_URL}?page=3"]
@@ -0,0 +1,41 @@
+import config
+import neardup
+import storage
+from sources import huggingface
+
+UNHEALTHY = {"preview": False, "viewer": False}
+HEALTHY = {"preview": True, "viewer": True}
+
+
+def _probe_with(statuses):
+    return lambda session, dataset_id: statuses[dataset_id]
+
+
+def test_health_signal_only_on_transition(db, monkeypatch):
+    monkeypatch.setattr(config, "HF_WATCHED_DATASETS", ["org/a", "org/b"])
+    monkeypatch.setattr(huggingface, "_probe", _probe_with({"org/a": UNHEALTHY, "org/b": HEALTHY}))
+
+    signals = list(huggingface._iter_dataset_health())
+    assert [s["dataset_id"] for s in signals] == ["org/a"]
+    assert list(huggingface._iter_dataset_health()) == []
+
+
+def test_health_state_not_saved_when_signal_refused(db, monkeypatch):
+    monkeypatch.setattr(config, "HF_WATCHED_DATASETS", ["org/a"])
+    monkeypatch.setattr(huggingface, "_probe", _probe_with({"org/a": UNHEALTHY}))
+
+    gen = huggingface._iter_dataset_health()
+    next(gen)
+    gen.close()  # the pipeline stopped before accepting the signal
+    assert storage.get_dataset_health() == {}
+    assert len(list(huggingface._iter_dataset_health())) == 1
+
+
+def test_repeat_incident_is_not_a_near_duplicate(db):
+    first = {
+        "source": "huggingface_health", "title": "Dataset health issue: org/a",
+        "text": f"Dataset org/a has health issues: {UNHEALTHY}",
+        "url": "https://huggingface.co/datasets/org/a#health-20260101T000000Z",
+    }
+    repeat = dict(first, url="https://huggingface.co/datasets/org/a#health-20260201T000000Z")
+    assert [dup for _, dup in neardup.cluster([first, repeat])] == [None, None]
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import config
+import keywords
+from keywords import KeywordMatcher
+
+CLUSTERS = {
+    "quality": ["ground truth", "ground truth noise", "label noise", "Appen"],
+    "collapse": ["model collapse", "reward model"],
+    "vendor": ["Appen", "Scale AI"],
+}
+
+
+def _legacy(text, words):
+    text_lower = text.lower()
+    return [kw for kw in words if kw.lower() in text_lower]
+
+
+def _matchers(clusters):
+    matchers = [KeywordMatcher(clusters, use_automaton=False)]
+    if keywords.ahocorasick is not None:
+        matchers.append(KeywordMatcher(clusters))
+    return matchers
+
+
+@pytest.mark.parametrize("matcher", _matchers(CLUSTERS), ids=lambda m: "automaton" if m._automaton else "scan")
+def test_overlapping_and_nested_keywords(matcher):
+    hit = matcher.match("The REWARD MODEL COLLAPSE came from ground truth noise; it happens.")
+    assert hit.keywords == ("ground truth", "ground truth noise", "Appen", "model collapse", "reward model")
+    assert hit.clusters == ("quality", "collapse", "vendor")
+    assert matcher.search("unrelated text") is False
+    assert not matcher.match("unrelated text")
+
+
+def test_all_paths_agree_with_legacy_scan_on_config_keywords():
+    rng = random.Random(0)
+    vocab = "the eval loss labels annotators model data quality vendor noise truth".split()
+    docs = []
+    for _ in range(300):
+        words = [rng.choice(vocab) for _ in range(rng.randint(5, 60))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(config.ALL_KEYWORDS).upper())
+        docs.append(" ".join(words))
+
+    for matcher in _matchers(config.KEYWORD_CLUSTERS):
+        for doc in docs:
+            expected = _legacy(doc, config.ALL_KEYWORDS)
+            assert matcher.search(doc) == bool(expected)
+            assert set(matcher.match(doc).keywords) == set(expected)
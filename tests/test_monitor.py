@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+
+import pytest
+
+import config
+import monitor
+import notify
+import scoring
+import storage
+
+
+def _signal(i):
+    return ("signal", "src", {"url": f"https://example.com/{i}"})
+
+
+def test_close_returns_queued_events_and_refuses_more():
+    intake = monitor._Intake(maxsize=4)
+    running = threading.Event()
+    assert intake.put(_signal(1), running)
+    assert intake.put(_signal(2), running)
+
+    assert intake.close() == [_signal(1), _signal(2)]
+    assert not intake.put(_signal(3), running)
+    assert intake.take(timeout=0) == []
+
+
+def test_cancelled_source_cannot_put():
+    intake = monitor._Intake(maxsize=4)
+    cancelled = threading.Event()
+    cancelled.set()
+    assert not intake.put(_signal(1), cancelled)
+    assert intake.close() == []
+
+
+def test_producer_resumes_only_after_put_is_accepted():
+    # A source saves progress after its yield returns; once cancelled, that
+    # code must not run for a signal the intake refused.
+    saved = []
+    cancel_event = threading.Event()
+
+    def source():
+        for i in range(3):
+            yield {"url": f"https://example.com/{i}"}
+            saved.append(i)
+            if i == 0:
+                cancel_event.set()
+
+    intake = monitor._Intake(maxsize=10)
+    monitor._produce("src", source, intake, cancel_event)
+
+    events = intake.close()
+    assert [e[2]["url"] for e in events] == ["https://example.com/0"]
+    assert saved == [0]
+
+
+class InstantEngine:
+    """ScoringEngine stand-in scoring every signal as a lead at once."""
+
+    def __init__(self):
+        self._done = []
+        self.outstanding = 0
+
+    def submit(self, signal, boost=0.0):
+        scores = dict(scoring.empty_scores("Lead"), total_score=90)
+        self._done.append((signal, scores))
+
+    def completed(self, timeout=0.0):
+        done, self._done = self._done, []
+        return iter(done)
+
+    def drain(self):
+        return self.completed()
+
+    def close(self):
+        pass
+
+
+def test_leads_are_notified_after_their_transaction_commits(db, monkeypatch):
+    signal = {"source": "reddit", "title": "Need annotators", "text": "We need a labeling vendor.",
+              "url": "https://reddit.com/r/ml/1", "author": "a"}
+    monkeypatch.setattr(monitor, "SOURCES", [("Fake", "fake", lambda: iter([signal]))])
+    monkeypatch.setattr(monitor, "ScoringEngine", InstantEngine)
+    monkeypatch.setattr(config, "SCORING_MODE", "sync")
+    monkeypatch.setattr(config, "PRESCORE_ENABLED", False)
+    seen_at_notify = []
+
+    def notify_lead(signal, scores):
+        # Another connection sees the row only once it has committed
+        with sqlite3.connect(config.DB_PATH) as conn:
+            row = conn.execute("SELECT total_score FROM signals WHERE url = ?", (signal["url"],)).fetchone()
+        seen_at_notify.append((row, storage._get_conn().in_transaction))
+
+    monkeypatch.setattr(notify, "notify_lead", notify_lead)
+    monitor.run()
+
+    assert seen_at_notify == [((90,), False)]
+    assert storage.get_signal_scores(signal["url"])["total_score"] == 90
+    assert storage.get_pending_rescores() == []
+
+
+class CrashingEngine(InstantEngine):
+    def completed(self, timeout=0.0):
+        return iter(())
+
+    def drain(self):
+        raise RuntimeError("job cancelled")
+
+
+def test_signals_accepted_by_a_crashed_run_are_queued_for_the_next(db, monkeypatch):
+    signal = {"source": "reddit", "title": "Need annotators", "text": "We need a labeling vendor.",
+              "url": "https://reddit.com/r/ml/2", "author": "a"}
+    monkeypatch.setattr(monitor, "SOURCES", [("Fake", "fake", lambda: iter([signal]))])
+    monkeypatch.setattr(monitor, "ScoringEngine", CrashingEngine)
+    monkeypatch.setattr(config, "SCORING_MODE", "sync")
+    monkeypatch.setattr(config, "PRESCORE_ENABLED", False)
+
+    with pytest.raises(RuntimeError):
+        monitor.run()
+
+    storage.init_db()
+    assert [s["url"] for s in storage.get_pending_rescores()] == [signal["url"]]
+
+
+def test_budget_deferrals_expire_after_max_days(db):
+    fresh = {"source": "reddit", "title": "Fresh", "text": "", "url": "https://reddit.com/r/ml/fresh"}
+    stale = dict(fresh, title="Stale", url="https://reddit.com/r/ml/stale")
+    for signal in (fresh, stale):
+        assert monitor._defer_rescore(signal, scoring.deferred_scores(), {}) == 1
+    with storage.batch() as conn:
+        conn.execute("UPDATE pending_rescore SET first_failed = datetime('now', '-30 days') WHERE url = ?",
+                     (stale["url"],))
+
+    assert monitor._defer_rescore(fresh, scoring.deferred_scores(), {}) == 1
+    assert monitor._defer_rescore(stale, scoring.deferred_scores(), {}) == 0
+    assert [s["url"] for s in storage.get_pending_rescores()] == [fresh["url"]]
+    assert storage.get_signal_scores(stale["url"]) is not None
+    assert storage.get_scored_history() == []
+
+
+def test_failed_signals_given_up_on_are_not_training_data(db, monkeypatch):
+    monkeypatch.setattr(config, "SCORING_RESCORE_MAX_ATTEMPTS", 1)
+    signal = {"source": "reddit", "title": "Broken", "text": "", "url": "https://reddit.com/r/ml/broken"}
+
+    assert monitor._defer_rescore(signal, scoring.failed_scores("Error: overloaded"), {}) == 0
+    assert storage.get_signal_scores(signal["url"]) is not None
+    assert storage.get_scored_history() == []
+
+
+class PartialDrainEngine(InstantEngine):
+    """Scores everything, but the drain fails after three results."""
+
+    def completed(self, timeout=0.0):
+        return iter(())
+
+    def drain(self):
+        for i, result in enumerate(self._done):
+            if i == 3:
+                raise RuntimeError("connection lost")
+            yield result
+
+
+def test_drain_commits_results_as_they_arrive(db, monkeypatch):
+    signals = [{"source": "reddit", "title": f"Need annotators {i}", "text": f"We need a labeling vendor {i}.",
+                "url": f"https://reddit.com/r/ml/{i}", "author": "a"} for i in range(5)]
+    monkeypatch.setattr(monitor, "SOURCES", [("Fake", "fake", lambda: iter(signals))])
+    monkeypatch.setattr(monitor, "ScoringEngine", PartialDrainEngine)
+    monkeypatch.setattr(monitor, "COLLECT_BATCH_SIZE", 2)
+    monkeypatch.setattr(config, "SCORING_MODE", "sync")
+    monkeypatch.setattr(config, "PRESCORE_ENABLED", False)
+    monkeypatch.setattr(config, "NEARDUP_ENABLED", False)
+    notified = []
+    monkeypatch.setattr(notify, "notify_lead", lambda signal, scores: notified.append(signal["url"]))
+
+    with pytest.raises(RuntimeError):
+        monitor.run()
+
+    storage.init_db()
+    stored = [s["url"] for s in signals if storage.get_signal_scores(s["url"]) is not None]
+    assert stored == [s["url"] for s in signals[:2]]
+    assert notified == stored
+    assert {s["url"] for s in storage.get_pending_rescores()} == {s["url"] for s in signals[2:]}
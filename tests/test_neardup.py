@@ -0,0 +1,61 @@
+import random
+
+import config
+import neardup
+
+POST = (
+    "We have been using an outside vendor to label about forty thousand support tickets "
+    "for intent classification and the quality has been getting worse every week, "
+    "with annotators disagreeing on almost a third of the examples we spot check."
+)
+
+
+def _signal(url, text, title="Labeling quality keeps dropping"):
+    return {"source": "reddit", "title": title, "text": text, "url": url}
+
+
+def test_hashes_within_max_distance_share_a_band():
+    rng = random.Random(0)
+    for _ in range(500):
+        value = rng.getrandbits(64)
+        other = value
+        for bit in rng.sample(range(64), rng.randint(0, config.NEARDUP_MAX_DISTANCE)):
+            other ^= 1 << bit
+        assert any(a == b for a, b in zip(neardup.bands(value), neardup.bands(other)))
+
+
+def test_bands_cover_all_64_bits():
+    parts = neardup.bands((1 << 64) - 1, count=6)
+    assert sum(part.bit_length() for part in parts) == 64
+
+
+def test_lightly_edited_cross_post_clusters_onto_the_first(db):
+    original = _signal("https://reddit.com/r/a/1", POST)
+    cross_post = _signal("https://reddit.com/r/b/2", POST.replace("every week", "each week") + " Any advice?")
+    unrelated = _signal(
+        "https://reddit.com/r/c/3",
+        "Our training run on eight GPUs crashes with an out of memory error after the first "
+        "epoch whenever gradient checkpointing is turned off, even with a small batch size.",
+        title="OOM during fine-tuning",
+    )
+
+    assert neardup.hamming(neardup.signal_simhash(original), neardup.signal_simhash(cross_post)) \
+        <= config.NEARDUP_MAX_DISTANCE
+    result = neardup.cluster([original, cross_post, unrelated])
+    assert [dup for _, dup in result] == [None, original["url"], None]
+
+
+def test_representatives_persist_across_runs(db):
+    neardup.cluster([_signal("https://reddit.com/r/a/1", POST)])
+    (_, dup), = neardup.cluster([_signal("https://reddit.com/r/b/2", POST)])
+    assert dup == "https://reddit.com/r/a/1"
+    # The same URL is never its own duplicate
+    (_, dup), = neardup.cluster([_signal("https://reddit.com/r/a/1", POST)])
+    assert dup is None
+
+
+def test_short_texts_are_not_clustered(db):
+    short = _signal("https://arxiv.org/abs/1", "", title="Data quality for LLMs")
+    again = dict(short, url="https://arxiv.org/abs/2")
+    assert neardup.signal_simhash(short) is None
+    assert [dup for _, dup in neardup.cluster([short, again])] == [None, None]
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import config
+import prescorer
+
+np = pytest.importorskip("numpy")
+
+
+class FixedModel:
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def predict_proba(self, signals):
+        return np.array([self.probabilities[s["url"]] for s in signals])
+
+
+SIGNALS = [{"url": "lead"}, {"url": "borderline"}, {"url": "noise"}]
+PROBABILITIES = {"lead": 0.9, "borderline": 0.05, "noise": 0.01}
+
+
+def test_partition_skips_below_threshold():
+    gate = prescorer.Gate(FixedModel(PROBABILITIES), skip_probability=0.05, audit_rate=0.0)
+
+    to_score, skipped = gate.partition(SIGNALS)
+
+    assert [s["url"] for s in to_score] == ["lead", "borderline"]
+    assert skipped == [({"url": "noise"}, 0.01)]
+    assert (gate.skipped, gate.audited) == (1, 0)
+
+
+def test_audited_skips_still_go_to_haiku():
+    gate = prescorer.Gate(FixedModel(PROBABILITIES), skip_probability=0.5, audit_rate=1.0)
+
+    to_score, skipped = gate.partition(SIGNALS)
+
+    assert len(to_score) == 3 and skipped == []
+    assert (gate.skipped, gate.audited) == (0, 2)
+
+
+def test_model_separates_leads_from_noise():
+    rng = random.Random(0)
+    lead_words = "vendor labeling budget contract annotation quality hiring".split()
+    noise_words = "cuda traceback install error pip version segfault".split()
+
+    def make(words, n):
+        return [{"source": "reddit", "title": " ".join(rng.sample(words, 3)),
+                 "text": " ".join(rng.choices(words, k=20))} for _ in range(n)]
+
+    leads, noise = make(lead_words, 40), make(noise_words, 160)
+    model = prescorer.PreScorer(dims=2 ** 12).fit(leads + noise, [1] * 40 + [0] * 160)
+
+    report = prescorer.evaluate(model, make(lead_words, 20) + make(noise_words, 20), [1] * 20 + [0] * 20, 0.05)
+    assert report["recall"] == 1.0
+    assert report["skip_rate"] >= 0.45
+
+
+def test_gate_disabled_without_enough_history(db, monkeypatch):
+    monkeypatch.setattr(config, "PRESCORE_ENABLED", True)
+    assert prescorer.train_gate() is None
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+import ratelimit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleep() advances it instead of waiting."""
+    state = SimpleNamespace(now=1000.0, slept=[])
+
+    def sleep(seconds):
+        state.slept.append(seconds)
+        state.now += seconds
+
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(monotonic=lambda: state.now, sleep=sleep))
+    return state
+
+
+def test_bucket_allows_a_burst_then_paces_at_the_rate(clock):
+    bucket = ratelimit.TokenBucket(per_minute=60, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_bucket_refills_over_time_up_to_capacity(clock):
+    bucket = ratelimit.TokenBucket(per_minute=60, capacity=2)
+    bucket.acquire(2)
+    clock.now += 60
+    bucket.acquire(2)
+    assert clock.slept == []
+    bucket.acquire(1)
+    assert sum(clock.slept) == pytest.approx(1.0)
+
+
+def test_pause_blocks_callers_and_drains_the_bucket(clock):
+    bucket = ratelimit.TokenBucket(per_minute=600)
+    bucket.pause(5)
+    bucket.acquire()
+    assert sum(clock.slept) == pytest.approx(5.0)
+
+
+def test_zero_rate_disables_limiting(clock):
+    bucket = ratelimit.TokenBucket(per_minute=0)
+    for _ in range(1000):
+        bucket.acquire()
+    assert clock.slept == []
+
+
+def test_breaker_opens_after_threshold_consecutive_failures(clock):
+    breaker = ratelimit.CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+
+    assert breaker.is_open
+    with pytest.raises(ratelimit.CircuitOpenError):
+        breaker.check()
+
+
+def test_breaker_lets_one_trial_through_after_cooldown(clock):
+    breaker = ratelimit.CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.check()
+    with pytest.raises(ratelimit.CircuitOpenError):
+        breaker.check()  # only one trial at a time
+
+    breaker.record_failure()  # failed trial re-opens for another cooldown
+    with pytest.raises(ratelimit.CircuitOpenError):
+        breaker.check()
+
+    clock.now += 30
+    breaker.check()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.check()
+
+
+def test_zero_threshold_never_opens(clock):
+    breaker = ratelimit.CircuitBreaker(threshold=0, cooldown=30)
+    for _ in range(10):
+        breaker.record_failure()
+    breaker.check()
+    assert not breaker.is_open
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from sources import reddit
+
+
+class FakeSubreddit:
+    """Newest-first listings of (created_utc, fullname) items."""
+
+    def __init__(self, items):
+        self._items = [SimpleNamespace(created_utc=t, fullname=name) for t, name in items]
+
+    def new(self, limit=None):
+        return iter(self._items[:limit])
+
+
+def _scan(subreddit, limit):
+    return list(reddit._scan_listing(subreddit, "Sub", "new", limit, lambda item: item.fullname))
+
+
+def test_cursor_advances_once_the_old_cursor_is_reached(db):
+    reddit._save_cursor("new", "Sub", 100.0, "t3_a")
+    subreddit = FakeSubreddit([(300, "t3_c"), (200, "t3_b"), (100, "t3_a"), (50, "t3_z")])
+
+    assert _scan(subreddit, limit=10) == ["t3_c", "t3_b"]
+    assert reddit._load_cursor("new", "Sub") == (300.0, "t3_c")
+
+
+def test_cursor_kept_when_limit_hit_before_the_old_cursor(db):
+    reddit._save_cursor("new", "Sub", 100.0, "t3_a")
+    subreddit = FakeSubreddit([(400, "t3_d"), (300, "t3_c"), (200, "t3_b"), (100, "t3_a")])
+
+    assert _scan(subreddit, limit=2) == ["t3_d", "t3_c"]
+    assert reddit._load_cursor("new", "Sub") == (100.0, "t3_a")
+
+
+def test_cursor_advances_when_listing_runs_out(db):
+    reddit._save_cursor("new", "Sub", 100.0, "t3_gone")
+    subreddit = FakeSubreddit([(300, "t3_c"), (200, "t3_b")])
+
+    assert _scan(subreddit, limit=10) == ["t3_c", "t3_b"]
+    assert reddit._load_cursor("new", "Sub") == (300.0, "t3_c")
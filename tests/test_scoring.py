@@ -0,0 +1,103 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import scoring
+
+
+def _item(pain, **extra):
+    return dict({"pain_intensity": pain, "urgency": 0, "commercial_context": 0, "decision_maker": 0,
+                 "anthromind_fit": 0, "category": "Annotation Quality", "reasoning": "", "suggested_hook": ""},
+                **extra)
+
+
+def _signals(n, text="We keep fighting label noise from our vendor."):
+    return [{"source": "reddit", "title": f"Signal {i}", "text": f"{text} ({i})", "url": f"https://example.com/{i}"}
+            for i in range(n)]
+
+
+def test_items_are_matched_by_id_not_position():
+    reply = json.dumps([_item(3, id=2), _item(1, id=1), _item(5, id=3)])
+    assert [s["pain_intensity"] for s in scoring.parse_multi_scores(reply, 3)] == [1, 3, 5]
+
+
+def test_items_without_id_fall_back_to_position():
+    reply = json.dumps([_item(1), _item(2)])
+    assert [s["pain_intensity"] for s in scoring.parse_multi_scores(reply, 2)] == [1, 2]
+
+
+def test_missing_and_malformed_items_come_back_none():
+    reply = json.dumps([_item(1, id=1), _item("high", id=2), "not an object", _item(4, id=9)])
+    results = scoring.parse_multi_scores(reply, 3)
+    assert results[0]["pain_intensity"] == 1
+    assert results[1:] == [None, None]
+
+
+def test_reply_that_is_not_an_array_raises():
+    with pytest.raises(json.JSONDecodeError):
+        scoring.parse_multi_scores(json.dumps(_item(1)), 1)
+
+
+def test_packs_split_on_count_and_token_budget():
+    signals = _signals(5)
+    per_signal = scoring.estimate_tokens(scoring.build_user_message(signals[0]))
+
+    by_count = list(scoring.pack_signals(signals, token_budget=10 ** 6, max_signals=2))
+    assert [len(p) for p in by_count] == [2, 2, 1]
+
+    by_tokens = list(scoring.pack_signals(signals, token_budget=per_signal * 3 + 1, max_signals=10))
+    assert [len(p) for p in by_tokens] == [3, 2]
+
+    huge = _signals(1, text="word " * 5000) + signals[:1]
+    assert [len(p) for p in scoring.pack_signals(huge, token_budget=per_signal * 3, max_signals=10)] == [1, 1]
+
+
+@pytest.fixture
+def api(db, monkeypatch):
+    """Stub _create_message; ``api.replies`` are returned in order, requests recorded."""
+    monkeypatch.setattr(config, "ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(config, "SCORING_RUN_MAX_CALLS", 0)
+    monkeypatch.setattr(config, "SCORING_RUN_MAX_TOKENS", 0)
+    monkeypatch.setattr(config, "SCORING_PACK_MAX_SIGNALS", 8)
+    monkeypatch.setattr(config, "SCORING_PACK_TOKEN_BUDGET", 10 ** 6)
+    state = SimpleNamespace(replies=[], requests=[])
+
+    def create_message(user_message, limiter=None, max_tokens=500, signals=1):
+        state.requests.append(signals)
+        return SimpleNamespace(content=[SimpleNamespace(text=state.replies.pop(0))])
+
+    monkeypatch.setattr(scoring, "_create_message", create_message)
+    return state
+
+
+def test_score_signals_packs_one_request(api):
+    api.replies = [json.dumps([_item(i + 1, id=i + 1) for i in range(3)])]
+
+    results = scoring.score_signals(_signals(3))
+
+    assert api.requests == [3]
+    assert [s["pain_intensity"] for s in results] == [1, 2, 3]
+
+
+def test_malformed_pack_items_are_rescored_one_at_a_time(api):
+    api.replies = [
+        json.dumps([_item(1, id=1), _item("high", id=2)]),  # item 3 missing, item 2 malformed
+        json.dumps(_item(7)),
+        json.dumps(_item(8)),
+    ]
+
+    results = scoring.score_signals(_signals(3))
+
+    assert api.requests == [3, 1, 1]
+    assert [s["pain_intensity"] for s in results] == [1, 7, 8]
+
+
+def test_scored_packs_are_cached(api):
+    signals = _signals(2)
+    api.replies = [json.dumps([_item(2, id=1), _item(4, id=2)])]
+    scoring.score_signals(signals)
+
+    assert [s["pain_intensity"] for s in scoring.score_signals(signals)] == [2, 4]
+    assert api.requests == [2]
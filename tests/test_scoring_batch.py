@@ -0,0 +1,104 @@
+import pytest
+
+import config
+import scoring
+import scoring_batch
+from scoring_batch import FakeBatchClient
+
+
+def _signals(n):
+    return [
+        {"source": "reddit", "title": f"Labeling vendor problem {i}", "text": f"Our annotation vendor missed deadline {i}.",
+         "url": f"https://example.com/{i}"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def sync_calls(db, monkeypatch):
+    """Signals that reach the synchronous fallback, in order."""
+    monkeypatch.setattr(config, "SCORING_BATCH_MIN_SIZE", 1)
+    calls = []
+
+    def score_signal(signal, limiter=None):
+        calls.append(signal["url"])
+        return scoring.empty_scores("sync")
+
+    monkeypatch.setattr(scoring, "score_signal", score_signal)
+    return calls
+
+
+def _score(signals, client):
+    return dict((signal["url"], scores) for signal, scores in
+                scoring_batch.score_batch(signals, client=client, poll_interval=0))
+
+
+def test_polls_until_the_batch_ends(sync_calls):
+    client = FakeBatchClient(polls_until_done=3)
+    signals = _signals(4)
+
+    results = _score(signals, client)
+
+    assert client._batches["msgbatch_fake_1"]["polls"] == 3
+    assert len(results) == 4 and all(s["reasoning"] == "Fake batch reply." for s in results.values())
+    assert sync_calls == []
+
+
+def test_errored_items_fall_back_to_sync(sync_calls):
+    client = FakeBatchClient(errored={"signal-1"})
+    signals = _signals(3)
+
+    results = _score(signals, client)
+
+    assert sync_calls == ["https://example.com/1"]
+    assert results["https://example.com/1"]["reasoning"] == "sync"
+    assert results["https://example.com/0"]["reasoning"] == "Fake batch reply."
+
+
+def test_signals_past_the_token_budget_are_deferred(sync_calls, monkeypatch):
+    signals = _signals(5)
+    per_signal = (scoring.estimate_tokens(scoring.SCORING_PROMPT) + scoring_batch._EST_OUTPUT_TOKENS
+                  + max(scoring.estimate_tokens(scoring.build_user_message(s)) for s in signals))
+    monkeypatch.setattr(config, "SCORING_RUN_MAX_TOKENS", scoring.get_stats()["tokens"] + 2 * per_signal)
+
+    results = _score(signals, FakeBatchClient())
+
+    deferred = [url for url, scores in results.items() if scores.get("deferred")]
+    assert deferred == [s["url"] for s in signals[2:]]
+    assert not results["https://example.com/0"].get("failed")
+
+
+def test_timeout_keeps_finished_results_and_rescores_the_rest(sync_calls, monkeypatch):
+    monkeypatch.setattr(config, "SCORING_BATCH_TIMEOUT_SECONDS", 0)
+    client = FakeBatchClient(polls_until_done=1000, unfinished={"signal-2"})
+    signals = _signals(4)
+
+    results = _score(signals, client)
+
+    assert client._batches["msgbatch_fake_1"]["cancelled"]
+    assert sync_calls == ["https://example.com/2"]
+    assert sum(s["reasoning"] == "Fake batch reply." for s in results.values()) == 3
+
+
+class FlakyResultsClient(FakeBatchClient):
+    """Drops the connection after streaming ``good`` results."""
+
+    def __init__(self, good, **kwargs):
+        super().__init__(**kwargs)
+        self._good = good
+
+    def results(self, batch_id):
+        for i, entry in enumerate(super().results(batch_id)):
+            if i == self._good:
+                raise ConnectionError("connection reset")
+            yield entry
+
+
+def test_results_stream_error_rescores_the_unread_items(sync_calls):
+    signals = _signals(4)
+
+    results = _score(signals, FlakyResultsClient(good=1))
+
+    assert results["https://example.com/0"]["reasoning"] == "Fake batch reply."
+    assert sync_calls == [s["url"] for s in signals[1:]]
+    assert len(results) == 4
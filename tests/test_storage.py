@@ -0,0 +1,34 @@
+import threading
+
+import storage
+
+
+def test_threads_reopen_after_close(db):
+    storage.set_cursor("test", "key", "before")
+    opened, closed, result = threading.Event(), threading.Event(), []
+
+    def worker():
+        storage.get_cursor("test", "key")
+        opened.set()
+        closed.wait(5)
+        # This thread's connection was closed by another thread
+        result.append(storage.get_cursor("test", "key"))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait(5)
+    storage.close()
+    closed.set()
+    thread.join(5)
+
+    assert result == ["before"]
+
+
+def test_batch_rolls_back_on_error(db):
+    try:
+        with storage.batch():
+            storage.set_cursor("test", "key", "uncommitted")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert storage.get_cursor("test", "key") is None